@@ -0,0 +1,81 @@
+# Cold import time of the app's modules, each measured in a fresh
+# interpreter with -X importtime. Use --max-ms to fail on regressions.
+#
+#   python -m benchmarks.bench_import --max-ms utils.pipeline=300
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = (
+    "utils.Extraction",
+    "utils.pipeline",
+    "utils.batch",
+    "utils.bulk_ingest",
+    "utils.ocr",
+    "utils.pdf_renderer",
+    "utils.train_lightgbm",
+)
+
+# Imports that should stay out of a cold start of these modules.
+HEAVY = ("pandas", "pdfplumber", "pytesseract", "PIL", "reportlab", "lightgbm", "streamlit")
+
+
+def measure(module, repeat=3):
+    best = None
+    heavy = []
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        wall = time.perf_counter() - start
+
+        cumulative = None
+        for line in proc.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            parts = [p.strip() for p in line.split("|")]
+            if len(parts) == 3 and parts[2] == module:
+                cumulative = int(parts[1]) / 1000.0
+        if best is None or cumulative < best[0]:
+            best = (cumulative, wall)
+        heavy = [m for m in proc.stdout.strip().split(",") if m]
+
+    return {"module": module, "import_ms": best[0], "process_ms": best[1] * 1000.0, "heavy": heavy}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=list(MODULES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-ms", action="append", default=[],
+                        help="module=ms budget for the cumulative import time")
+    args = parser.parse_args(argv)
+
+    budgets = dict(item.split("=", 1) for item in args.max_ms)
+    failed = False
+
+    print(f"{'module':<24} {'import ms':>10} {'process ms':>11}  heavy deps loaded")
+    for module in args.modules:
+        r = measure(module, args.repeat)
+        print(f"{module:<24} {r['import_ms']:>10.1f} {r['process_ms']:>11.1f}  {', '.join(r['heavy']) or '-'}")
+        budget = budgets.get(module)
+        if budget is not None and r["import_ms"] > float(budget):
+            print(f"  over budget: {r['import_ms']:.1f} ms > {budget} ms")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
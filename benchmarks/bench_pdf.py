@@ -0,0 +1,126 @@
+# Throughput of the PDF stage: the original per-request generate_diet_pdf
+# against DietPdfRenderer (single, multi-document and parallel files).
+#
+#   python -m benchmarks.bench_pdf --plans 500
+
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+from utils.pdf_renderer import DietPdfRenderer, render_files
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MEALS = ["Oats with berries", "Vegetable Dalia", "Grilled tofu with sautéed veggies",
+         "Quinoa salad with roasted veggies", "Sprouts salad", "Mixed berries",
+         "Vegetable soup", "Paneer tikka with salad", "Millet khichdi with vegetables"]
+
+
+# Reference implementation as it was before DietPdfRenderer.
+def legacy_generate_diet_pdf(name, age, condition, diet_type, avoid, lifestyle, diet_df):
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    elements = []
+
+    elements.append(Paragraph("<b>AI Diet Planner – 7 Day Diet Plan</b>", styles["Title"]))
+    elements.append(Paragraph("<br/>", styles["Normal"]))
+
+    elements.append(Paragraph(f"Name: {name}", styles["Normal"]))
+    elements.append(Paragraph(f"Age: {age}", styles["Normal"]))
+    elements.append(Paragraph(f"Condition: {condition}", styles["Normal"]))
+    elements.append(Paragraph(f"Diet Type: {diet_type}", styles["Normal"]))
+    elements.append(Paragraph("<br/>", styles["Normal"]))
+
+    for _, row in diet_df.iterrows():
+        elements.append(Paragraph(
+            f"<b>{row['Day']}</b><br/>"
+            f"Breakfast: {row['Breakfast']}<br/>"
+            f"Lunch: {row['Lunch']}<br/>"
+            f"Snacks: {row['Snacks']}<br/>"
+            f"Dinner: {row['Dinner']}<br/><br/>",
+            styles["Normal"]
+        ))
+
+    elements.append(Paragraph("<b>Foods to Avoid</b>", styles["Heading2"]))
+    elements.append(Paragraph(", ".join(avoid), styles["Normal"]))
+
+    elements.append(Paragraph("<br/><b>Lifestyle Recommendations</b>", styles["Heading2"]))
+    for l in lifestyle:
+        elements.append(Paragraph(f"• {l}", styles["Normal"]))
+
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
+
+
+def make_plans(n, seed=0):
+    rng = random.Random(seed)
+    plans = []
+    for i in range(n):
+        plans.append({
+            "name": f"Patient {i}",
+            "age": str(rng.randint(20, 80)),
+            "condition": rng.choice(["Diabetes", "High Cholesterol", "General Health"]),
+            "diet_type": rng.choice(["Veg", "Non-Veg"]),
+            "avoid": ["Sugar", "White rice", "Soft drinks"],
+            "lifestyle": ["Exercise at least 30 minutes daily", "Drink 2–3 liters of water"],
+            "days": [
+                {"Day": d, "Breakfast": rng.choice(MEALS), "Lunch": rng.choice(MEALS),
+                 "Snacks": rng.choice(MEALS), "Dinner": rng.choice(MEALS)}
+                for d in DAYS
+            ]
+        })
+    return plans
+
+
+def _report(label, n, seconds, baseline=None):
+    line = f"{label:<28} {n / seconds:8.1f} plans/s  ({seconds:.2f}s)"
+    if baseline:
+        line += f"  x{baseline / seconds:.2f}"
+    print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plans", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    plans = make_plans(args.plans)
+    frames = [pd.DataFrame(p["days"]) for p in plans]
+
+    start = time.perf_counter()
+    for plan, df in zip(plans, frames):
+        legacy_generate_diet_pdf(plan["name"], plan["age"], plan["condition"], plan["diet_type"],
+                                 plan["avoid"], plan["lifestyle"], df)
+    legacy = time.perf_counter() - start
+    _report("legacy generate_diet_pdf", args.plans, legacy)
+
+    renderer = DietPdfRenderer()
+    start = time.perf_counter()
+    for plan in plans:
+        renderer.render(plan)
+    _report("DietPdfRenderer.render", args.plans, time.perf_counter() - start, legacy)
+
+    start = time.perf_counter()
+    renderer.render_many(plans)
+    _report("DietPdfRenderer.render_many", args.plans, time.perf_counter() - start, legacy)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"plan_{i}.pdf") for i in range(args.plans)]
+        start = time.perf_counter()
+        render_files(plans, paths, workers=args.workers)
+        _report(f"render_files ({args.workers} workers)", args.plans,
+                time.perf_counter() - start, legacy)
+
+
+if __name__ == "__main__":
+    main()
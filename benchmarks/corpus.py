@@ -0,0 +1,238 @@
+# Deterministic synthetic medical reports for the benchmarks. The same seed
+# and profile always produce byte-identical files, so timings from different
+# commits are measured on the same input.
+#
+#   python -m benchmarks.corpus --out /tmp/diet_corpus --profile full
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+CORPUS_VERSION = "1"
+
+# pages for txt/pdf, frames for png/tiff, rows for csv
+PROFILES = {
+    "quick": {"txt": (1, 10), "pdf": (1, 10), "png": (1,), "tiff": (4,), "csv": (1, 1000, 100000)},
+    "full": {
+        "txt": (1, 10, 50, 200),
+        "pdf": (1, 10, 50, 200),
+        "png": (1,),
+        "tiff": (4, 16),
+        "csv": (1, 1000, 100000, 1000000),
+    },
+}
+
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "diet_bench_corpus")
+
+FIRST_NAMES = ("Ravi", "Anita", "Suresh", "Meera", "Arjun", "Priya", "Kiran", "Deepa")
+LAST_NAMES = ("Kumar", "Sharma", "Reddy", "Iyer", "Patel", "Nair", "Rao", "Gupta")
+DIAGNOSES = (
+    "Type 2 diabetes mellitus, on metformin.",
+    "High cholesterol noted; advised statins and diet control.",
+    "Hypertension, blood pressure elevated on repeat readings.",
+    "Diabetes with high cholesterol; review in three months.",
+    "No significant findings. General health check-up.",
+)
+FILLER = (
+    "Patient reports mild fatigue in the afternoons.",
+    "No known drug allergies.",
+    "Advised regular walking and reduced salt intake.",
+    "ECG within normal limits.",
+    "Follow-up with the physician after the next lab panel.",
+    "Liver and kidney function tests unremarkable.",
+)
+
+# --------------------------------------------------
+# REPORT TEXT
+# --------------------------------------------------
+def report_page(rng, page):
+    # One page of lab report. Page 1 carries the patient header; every page
+    # has lab values and free text so the extractors scan realistic input.
+    lines = []
+    if page == 0:
+        lines += [
+            f"Patient Name: {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            f"Age: {rng.randint(18, 85)}",
+            f"Sex: {rng.choice(('Male', 'Female'))}",
+        ]
+    lines += [
+        f"Lab panel {page + 1}",
+        f"BMI: {rng.uniform(17, 38):.1f}",
+        f"Blood Sugar (fasting): {rng.randint(70, 260)} mg/dL",
+        f"Cholesterol total: {rng.randint(120, 320)} mg/dL",
+        f"Hemoglobin: {rng.uniform(9, 17):.1f} g/dL",
+        f"Blood Pressure: {rng.randint(100, 180)}/{rng.randint(60, 110)} mmHg",
+        f"Diagnosis: {rng.choice(DIAGNOSES)}",
+    ]
+    lines += [rng.choice(FILLER) for _ in range(30)]
+    return lines
+
+
+def report_pages(seed, pages):
+    rng = random.Random(seed)
+    return [report_page(rng, i) for i in range(pages)]
+
+
+# --------------------------------------------------
+# WRITERS
+# --------------------------------------------------
+def write_txt(path, seed, pages):
+    with open(path, "w", encoding="utf-8", newline="\n") as fh:
+        for lines in report_pages(seed, pages):
+            fh.write("\n".join(lines) + "\n\n")
+
+
+def write_pdf(path, seed, pages):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    # invariant=1 drops the creation date and random document ID.
+    c = canvas.Canvas(path, pagesize=A4, invariant=1)
+    _, height = A4
+    for lines in report_pages(seed, pages):
+        y = height - 50
+        for line in lines:
+            c.drawString(50, y, line)
+            y -= 14
+        c.showPage()
+    c.save()
+
+
+def _page_image(lines):
+    from PIL import Image, ImageDraw
+
+    image = Image.new("L", (1240, 1754), 255)
+    draw = ImageDraw.Draw(image)
+    y = 60
+    for line in lines:
+        draw.text((60, y), line, fill=0)
+        y += 40
+    return image
+
+
+def write_png(path, seed, pages):
+    _page_image(report_pages(seed, 1)[0]).save(path, format="PNG")
+
+
+def write_tiff(path, seed, pages):
+    frames = [_page_image(lines) for lines in report_pages(seed, pages)]
+    frames[0].save(path, format="TIFF", save_all=True, append_images=frames[1:],
+                   compression="tiff_deflate")
+
+
+def write_csv(path, seed, rows):
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    diagnoses = np.array(DIAGNOSES)
+    # The analyzer's feature columns plus the prescription text.
+    frame = pd.DataFrame({
+        "patient_id": np.char.add("P", np.arange(rows).astype(str)),
+        "age": rng.integers(18, 86, rows),
+        "glucose": rng.integers(70, 261, rows),
+        "cholesterol": rng.integers(120, 321, rows),
+        "blood_pressure": rng.integers(100, 181, rows),
+        "bmi": np.round(rng.uniform(17, 38, rows), 1),
+        "doctor_prescription": diagnoses[rng.integers(0, len(diagnoses), rows)],
+    })
+    frame.to_csv(path, index=False)
+
+
+def write_model(path, seed, rows=5000):
+    # A LightGBM model with the shipped model's hyperparameters, trained on
+    # HealthRiskAnalyzer's feature columns, so scoring cases measure the
+    # same amount of work whatever artifact is in Model/.
+    import lightgbm as lgb
+
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(18, 86, rows),
+        rng.integers(70, 261, rows),
+        rng.integers(120, 321, rows),
+        rng.integers(100, 181, rows),
+        rng.uniform(17, 38, rows),
+    ]).astype(np.float64)
+    y = ((X[:, 1] > 140) | (X[:, 2] > 240) | (X[:, 3] > 140) | (X[:, 4] > 30)).astype(int)
+    params = {
+        "objective": "binary", "learning_rate": 0.05, "max_depth": 3, "num_leaves": 31,
+        "feature_fraction": 0.5, "bagging_fraction": 0.5, "bagging_freq": 1,
+        "seed": seed, "deterministic": True, "num_threads": 1, "verbose": -1,
+    }
+    booster = lgb.train(params, lgb.Dataset(X, y), num_boost_round=50)
+    booster.save_model(path)
+
+
+WRITERS = {"txt": write_txt, "pdf": write_pdf, "png": write_png, "tiff": write_tiff, "csv": write_csv}
+
+
+# --------------------------------------------------
+# CORPUS
+# --------------------------------------------------
+def _digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_corpus(out_dir=DEFAULT_CORPUS_DIR, profile="quick", seed=0, stream=None):
+    # Returns the manifest: one entry per file with kind, size and sha256.
+    # An existing corpus with the same version, profile and seed is reused.
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, f"manifest-{profile}-{seed}.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as fh:
+            manifest = json.load(fh)
+        paths = [f["path"] for f in manifest.get("files", ())] + [manifest.get("model", "")]
+        if manifest.get("version") == CORPUS_VERSION and all(os.path.exists(p) for p in paths):
+            return manifest
+
+    files = []
+    for kind, sizes in PROFILES[profile].items():
+        for size in sizes:
+            path = os.path.join(out_dir, f"{kind}_{size}_{seed}.{kind}")
+            if stream is not None:
+                stream.write(f"writing {path}\n")
+            WRITERS[kind](path, seed + size, size)
+            files.append({
+                "kind": kind,
+                "size": size,
+                "unit": "rows" if kind == "csv" else "pages",
+                "path": path,
+                "bytes": os.path.getsize(path),
+                "sha256": _digest(path),
+            })
+
+    model = os.path.join(out_dir, f"model_{seed}.txt")
+    write_model(model, seed)
+
+    manifest = {
+        "version": CORPUS_VERSION, "profile": profile, "seed": seed, "files": files, "model": model
+    }
+    with open(manifest_path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the synthetic benchmark corpus.")
+    parser.add_argument("--out", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--profile", default="quick", choices=sorted(PROFILES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    manifest = build_corpus(args.out, args.profile, args.seed, stream=sys.stderr)
+    for f in manifest["files"]:
+        print(f"{f['kind']:<5} {f['size']:>8} {f['unit']:<5} {f['bytes']:>12,} B  {f['sha256'][:12]}  {f['path']}")
+    print(f"model {manifest['model']}")
+
+
+if __name__ == "__main__":
+    main()
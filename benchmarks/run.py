@@ -0,0 +1,311 @@
+# Stage and end-to-end benchmarks over the synthetic corpus. Records p50/p99
+# latency, throughput and peak traced memory per case and compares them with
+# a stored baseline. Runs offline; the extraction cache points at a scratch
+# file so cold runs really re-extract.
+#
+#   python -m benchmarks.run --save-baseline benchmarks/baseline.json
+#   python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.2
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.corpus import DEFAULT_CORPUS_DIR, PROFILES, build_corpus
+
+# Differences below these are noise, whatever the ratio.
+MIN_DELTA_SECONDS = 0.002
+MIN_DELTA_BYTES = 1 << 20
+
+DOCUMENT_KINDS = ("txt", "pdf", "png", "tiff")
+IMAGE_KINDS = ("png", "tiff")
+
+
+# --------------------------------------------------
+# TIMING
+# --------------------------------------------------
+def time_case(fn, setup=None, min_runs=3, max_runs=50, budget=5.0):
+    # Repeat until max_runs or the time budget is spent, but at least
+    # min_runs times (once for cases slower than the whole budget).
+    samples = []
+    spent = 0.0
+    while len(samples) < max_runs:
+        if setup is not None:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        spent += elapsed
+        if spent >= budget and (len(samples) >= min_runs or elapsed >= budget):
+            break
+    return samples
+
+
+def peak_memory(fn, setup=None):
+    if setup is not None:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(samples, units):
+    samples = np.asarray(samples)
+    p50 = float(np.percentile(samples, 50))
+    return {
+        "runs": len(samples),
+        "p50_seconds": p50,
+        "p99_seconds": float(np.percentile(samples, 99)),
+        "mean_seconds": float(samples.mean()),
+        "throughput": units / p50 if p50 > 0 else 0.0,
+    }
+
+
+# --------------------------------------------------
+# CASES
+# --------------------------------------------------
+def iter_cases(manifest, seed=0, model_file=None, scratch_dir=None):
+    # Yields (name, unit, units, fn, setup). Imports stay here so the
+    # corpus can be built without loading the app. Outputs go to
+    # scratch_dir (default: the temp dir).
+    from utils import Extraction, pipeline
+    from utils.bulk_ingest import ingest_csv
+    from utils.extraction_cache import get_default_cache
+    from utils.model_registry import get_model
+    from utils.ocr import preprocess
+    from utils.train_lightgbm import HealthRiskAnalyzer
+
+    # Library imports and model loading are start-up costs, not per-case ones.
+    pipeline.warm_up()
+    cache = get_default_cache()
+    model_file = model_file or manifest["model"]
+    get_model(model_file)
+    analyzer = HealthRiskAnalyzer(model_file)
+
+    def reseed():
+        random.seed(seed)
+
+    for f in manifest["files"]:
+        kind, size, unit, path = f["kind"], f["size"], f["unit"], f["path"]
+        with open(path, "rb") as fh:
+            data = fh.read()
+        label = f"{kind}:{size}"
+
+        def report(data=data, path=path):
+            return pipeline.ReportFile(data, os.path.basename(path))
+
+        if kind in DOCUMENT_KINDS:
+            yield (f"extract_text[{label}]", unit, size,
+                   lambda report=report: Extraction.extract_text(report(), cache=False), None)
+
+            if kind in IMAGE_KINDS:
+                def ocr_preprocess(data=data):
+                    from PIL import Image, ImageSequence
+                    import io
+                    with Image.open(io.BytesIO(data)) as image:
+                        for frame in ImageSequence.Iterator(image):
+                            preprocess(frame.copy())
+                yield f"ocr_preprocess[{label}]", unit, size, ocr_preprocess, None
+                continue
+
+            text = Extraction.extract_report(report(), workers=1, cache=False)["text"].lower()
+            yield (f"extract_medical_info[{label}]", unit, size,
+                   lambda text=text: Extraction.extract_medical_info(text), None)
+            yield (f"extract_patient_info[{label}]", unit, size,
+                   lambda text=text: pipeline.extract_patient_info(text), None)
+            yield (f"generate_diet[{label}]", unit, size,
+                   lambda text=text: pipeline.generate_diet(text, "Veg"), reseed)
+
+            reseed()
+            result = pipeline.process_report(report(), "Veg")
+            yield f"render_pdf[{label}]", unit, size, lambda result=result: pipeline.render_pdf(result), None
+
+            def end_to_end(report=report):
+                pipeline.render_pdf(pipeline.process_report(report(), "Veg"))
+
+            def cold():
+                reseed()
+                cache.clear()
+
+            yield f"end_to_end_cold[{label}]", unit, size, end_to_end, cold
+            yield f"end_to_end_cached[{label}]", unit, size, end_to_end, reseed
+
+        elif kind == "csv":
+            # Only the first record is parsed, whatever the file's size.
+            yield (f"extract_text[{label}]", "files", 1,
+                   lambda report=report: Extraction.extract_text(report(), cache=False), None)
+
+            import pandas as pd
+            frame = pd.read_csv(path)
+            yield (f"analyze_batch[{label}]", unit, size,
+                   lambda frame=frame: analyzer.analyze_batch(frame), None)
+            del frame
+
+            out = os.path.join(scratch_dir or tempfile.gettempdir(), f"diet_bench_{os.getpid()}.jsonl")
+            yield (f"bulk_ingest[{label}]", unit, size,
+                   lambda path=path: ingest_csv(path, out, model_file, progress=_QuietProgress()),
+                   None)
+
+
+class _QuietProgress:
+    def update(self, rows):
+        pass
+
+    def report(self):
+        pass
+
+
+# --------------------------------------------------
+# BASELINE COMPARISON
+# --------------------------------------------------
+def compare(results, baseline, threshold):
+    # A case regresses when its p50 or peak memory grows by more than
+    # threshold (0.2 = 20%) and by more than the noise floor.
+    rows = []
+    for name, current in results["cases"].items():
+        before = baseline.get("cases", {}).get(name)
+        if before is None or "error" in current or "error" in before:
+            rows.append((name, None, None, False))
+            continue
+
+        time_ratio = current["p50_seconds"] / before["p50_seconds"] if before["p50_seconds"] else 1.0
+        slower = (time_ratio > 1 + threshold
+                  and current["p50_seconds"] - before["p50_seconds"] > MIN_DELTA_SECONDS)
+
+        mem_ratio = None
+        bigger = False
+        if current.get("peak_bytes") is not None and before.get("peak_bytes"):
+            mem_ratio = current["peak_bytes"] / before["peak_bytes"]
+            bigger = (mem_ratio > 1 + threshold
+                      and current["peak_bytes"] - before["peak_bytes"] > MIN_DELTA_BYTES)
+
+        rows.append((name, time_ratio, mem_ratio, slower or bigger))
+    return rows
+
+
+def _format_ratio(ratio):
+    return f"x{ratio:.2f}" if ratio is not None else "-"
+
+
+def print_results(results, comparison=None, stream=sys.stdout):
+    ratios = {name: (t, m, bad) for name, t, m, bad in comparison or ()}
+    stream.write(f"{'case':<40} {'runs':>5} {'p50 ms':>10} {'p99 ms':>10} "
+                 f"{'throughput':>16} {'peak MiB':>9}")
+    stream.write("  vs baseline (time, mem)\n" if comparison is not None else "\n")
+
+    for name, r in results["cases"].items():
+        if "error" in r:
+            stream.write(f"{name:<40} skipped: {r['error']}\n")
+            continue
+        peak = f"{r['peak_bytes'] / 2**20:9.1f}" if r.get("peak_bytes") is not None else f"{'-':>9}"
+        line = (f"{name:<40} {r['runs']:>5} {r['p50_seconds'] * 1000:>10.2f} "
+                f"{r['p99_seconds'] * 1000:>10.2f} {r['throughput']:>10,.1f} {r['unit'] + '/s':<5} {peak}")
+        if name in ratios:
+            t, m, bad = ratios[name]
+            line += f"  {_format_ratio(t)} {_format_ratio(m)}" + ("  REGRESSION" if bad else "")
+        stream.write(line + "\n")
+
+    stream.write(f"process peak RSS: {results['meta']['max_rss_bytes'] / 2**20:.1f} MiB\n")
+
+
+# --------------------------------------------------
+# MAIN
+# --------------------------------------------------
+def run(manifest, seed=0, budget=5.0, min_runs=3, max_runs=50, memory=True, only=None,
+        model_file=None, stream=sys.stderr, scratch_dir=None):
+    from utils.model_registry import peak_rss_bytes
+
+    cases = {}
+    for name, unit, units, fn, setup in iter_cases(manifest, seed, model_file, scratch_dir):
+        if only and not any(part in name for part in only):
+            continue
+        if stream is not None:
+            stream.write(f"{name}...\n")
+            stream.flush()
+        try:
+            samples = time_case(fn, setup, min_runs, max_runs, budget)
+            entry = {"unit": unit, "units": units, **summarize(samples, units)}
+            entry["peak_bytes"] = peak_memory(fn, setup) if memory else None
+        except Exception as exc:
+            # e.g. no tesseract binary for the OCR cases
+            entry = {"unit": unit, "units": units, "error": f"{type(exc).__name__}: {exc}"}
+        cases[name] = entry
+
+    return {
+        "meta": {
+            "corpus_version": manifest["version"],
+            "profile": manifest["profile"],
+            "seed": manifest["seed"],
+            "corpus": {os.path.basename(f["path"]): f["sha256"] for f in manifest["files"]},
+            "model": os.path.basename(model_file or manifest["model"]),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "max_rss_bytes": peak_rss_bytes(),
+        },
+        "cases": cases,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the report pipeline on a synthetic corpus.")
+    parser.add_argument("--profile", default="quick", choices=sorted(PROFILES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="Where to write/reuse the corpus")
+    parser.add_argument("--budget", type=float, default=5.0, help="Seconds of timed runs per case")
+    parser.add_argument("--min-runs", type=int, default=3)
+    parser.add_argument("--max-runs", type=int, default=50)
+    parser.add_argument("--model", help="Model for the scoring cases (default: the corpus model)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--only", action="append", help="Run cases whose name contains this")
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--baseline", help="Compare with this results JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown / memory growth before failing (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="diet_bench_") as scratch:
+        # Must be set before utils.extraction_cache is imported.
+        os.environ["DIET_EXTRACTION_CACHE"] = os.path.join(scratch, "extraction.sqlite")
+
+        manifest = build_corpus(args.corpus, args.profile, args.seed, stream=sys.stderr)
+        results = run(manifest, args.seed, args.budget, args.min_runs, args.max_runs,
+                      memory=not args.no_memory, only=args.only, model_file=args.model,
+                      scratch_dir=scratch)
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if baseline["meta"].get("corpus") != results["meta"]["corpus"]:
+            sys.stderr.write("warning: baseline was recorded on a different corpus\n")
+        comparison = compare(results, baseline, args.threshold)
+
+    print_results(results, comparison)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(results, fh, indent=2)
+
+    if comparison and any(bad for *_, bad in comparison):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,10 @@
 import streamlit as st
-import pandas as pd
-import pdfplumber
-import pytesseract
-from PIL import Image
-import spacy
+import hashlib
 import json
-import random
-import re
-import io
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from reportlab.platypus import SimpleDocTemplate, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.pagesizes import A4
+from utils.pipeline import SUPPORTED_EXTENSIONS, ReportFile, process_report, render_pdf, warm_up
 
 # -------------------- PAGE CONFIG --------------------
 st.set_page_config(
@@ -82,178 +75,108 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# -------------------- NLP --------------------
+# -------------------- WARM-UP --------------------
+# Runs once per server process, not once per session.
 @st.cache_resource
-def load_spacy():
-    return spacy.blank("en")
+def warm_start():
+    return warm_up()
 
-nlp = load_spacy()
+warm_start()
 
-# -------------------- TEXT EXTRACTION --------------------
-def extract_text(uploaded_file):
+# -------------------- BACKGROUND PLANNING --------------------
+PLAN_WORKERS = 2
+PLAN_CACHE_ENTRIES = 32
+
+@st.cache_resource
+def plan_executor():
+    # Shared by every session; plans run here, off the script thread, so a
+    # rerun (any widget interaction) doesn't cancel or repeat them.
+    return ThreadPoolExecutor(max_workers=PLAN_WORKERS, thread_name_prefix="diet-plan")
+
+# Results and artifacts are memoized per (file hash, extension, diet type,
+# seed). Underscored arguments are not part of the cache key.
+@st.cache_data(max_entries=PLAN_CACHE_ENTRIES, show_spinner=False)
+def build_plan(file_hash, ext, diet_type, seed, _data, _progress=None):
+    return process_report(ReportFile(_data, f"report.{ext}"), diet_type, seed=seed, progress=_progress)
+
+@st.cache_data(max_entries=PLAN_CACHE_ENTRIES, show_spinner=False)
+def build_pdf(file_hash, ext, diet_type, seed, _data):
+    return render_pdf(build_plan(file_hash, ext, diet_type, seed, _data)).getvalue()
+
+@st.cache_data(max_entries=PLAN_CACHE_ENTRIES, show_spinner=False)
+def build_json(file_hash, ext, diet_type, seed, _data):
+    diet_df = build_plan(file_hash, ext, diet_type, seed, _data)["diet_df"]
+    return json.dumps(diet_df.to_dict(), indent=4)
+
+def submit_plan(uploaded_file, diet_type, seed):
+    data = uploaded_file.getvalue()
     ext = uploaded_file.name.split(".")[-1].lower()
-    text = ""
-
-    if ext == "pdf":
-        with pdfplumber.open(uploaded_file) as pdf:
-            for page in pdf.pages:
-                if page.extract_text():
-                    text += page.extract_text()
-
-    elif ext in ["png", "jpg", "jpeg"]:
-        text = pytesseract.image_to_string(Image.open(uploaded_file))
-
-    elif ext == "txt":
-        text = uploaded_file.read().decode("utf-8")
-
-    elif ext == "csv":
-        text = pd.read_csv(uploaded_file).to_string()
-
-    return text.lower()
-
-# -------------------- PATIENT INFO --------------------
-def extract_patient_info(text):
-    name = re.search(r"name[:\-]?\s*([A-Za-z ]+)", text)
-    age = re.search(r"age[:\-]?\s*(\d+)", text)
-    return (
-        name.group(1).strip() if name else "Not Found",
-        age.group(1) if age else "Not Found"
-    )
-
-# -------------------- DIET GENERATION --------------------
-def generate_diet(text, diet_type="Veg"):
-    # -------------------- Vegetarian Meals --------------------
-    veg_meals = {
-        "Diabetes": {
-            "Breakfast": ["Oats with berries","Vegetable Dalia","Moong dal chilla","Multigrain toast with peanut butter","Smoothie with almond milk and spinach","Besan chilla with vegetables","Poha with peas and carrots","Upma with veggies","Greek yogurt with flaxseeds","Masala oats","Whole wheat sandwich with cucumber and tomato","Quinoa porridge with nuts","Chia pudding with almond milk","Low-fat paneer toast","Avocado toast with chia seeds","Cottage cheese smoothie","Vegetable idli","Sprouts upma","Almond flour pancakes"],
-            "Lunch": ["Brown rice with dal and vegetables","Grilled veggies with quinoa","Chickpea salad with olive oil dressing","Vegetable soup with chapati","Paneer stir fry with spinach and peppers","Lentil salad with cucumber and tomato","Millet khichdi with vegetables","Grilled tofu with sautéed veggies","Vegetable curry with whole wheat roti","Mixed bean salad","Zucchini noodles with tomato sauce","Vegetable stir fry with brown rice","Palak dal with millet roti","Quinoa salad with roasted veggies","Steamed broccoli with grilled paneer","Low-fat vegetable lasagna","Tomato and cucumber salad with lentils","Baked tofu with bell peppers","Cauliflower rice with veggies"],
-            "Snacks": ["Nuts (almonds, walnuts)","Seeds (pumpkin, sunflower)","Sprouts salad","Greek yogurt with cinnamon","Roasted chana","Carrot sticks with hummus","Apple slices with peanut butter","Cucumber and tomato salad","Mixed berries","Protein shake with almond milk","Celery sticks with hummus","Roasted almonds with cinnamon","Low-fat paneer cubes","Vegetable sticks with guacamole","Homemade trail mix","Green smoothie with spinach","Walnut and flaxseed mix","Edamame beans","Kale chips"],
-            "Dinner": ["Tofu stir fry with bell peppers","Vegetable soup","Zoodles with tomato sauce","Light lentil curry with spinach","Steamed vegetables with quinoa","Paneer tikka with salad","Stir-fried mushrooms and broccoli","Cauliflower rice with veggies","Vegetable curry with millet roti","Low-fat vegetable stew","Baked tofu with green beans","Spinach soup with whole wheat toast","Vegetable stir fry with tofu","Masala grilled paneer with salad","Zucchini and carrot noodles","Quinoa with roasted vegetables","Vegetable khichdi"]
-        },
-        "High Cholesterol": {
-            "Breakfast": ["Oats with apple and cinnamon","Multigrain toast with avocado","Vegetable smoothie with flaxseeds","Poha with peas","Chia pudding with berries","Quinoa porridge with nuts","Masala oats with vegetables","Green smoothie with spinach and banana","Whole wheat vegetable upma","Soy milk smoothie with berries","Sprouted moong salad","Almond flour pancakes","Low-fat paneer toast","Vegetable idli","Spinach and tomato omelette","Cottage cheese smoothie","Avocado and chia seed toast","Fruit and nut bowl","Overnight oats with seeds","Buckwheat porridge"],
-            "Lunch": ["Brown rice with lentils and vegetables","Quinoa salad with chickpeas","Vegetable soup with whole wheat bread","Paneer salad with olive oil","Stir-fried tofu with broccoli","Lentil soup with vegetables","Mixed vegetable curry with millet roti","Chickpea and spinach stir fry","Vegetable khichdi with flaxseeds","Steamed broccoli with tofu","Zucchini noodles with tomato sauce","Quinoa bowl with roasted veggies","Vegetable stir fry with brown rice","Palak dal with millet roti","Sprout salad with olive oil"],
-            "Snacks": ["Nuts (almonds, walnuts, pistachios)","Fruit bowl (apple, pear, berries)","Hummus with carrots/cucumber","Roasted chickpeas","Green smoothie with kale","Air-popped popcorn","Cucumber and tomato slices","Low-fat yogurt with seeds","Celery sticks with almond butter","Sprouts salad","Carrot and celery sticks with hummus","Mixed nuts with raisins","Vegetable sticks with guacamole","Protein smoothie with almond milk","Roasted pumpkin seeds","Kale chips","Edamame beans","Fruit and nut energy balls"],
-            "Dinner": ["Grilled tofu with vegetables","Stir-fried veggies with tofu","Vegetable soup with herbs","Zoodles with tomato sauce","Steamed vegetables with brown rice","Quinoa bowl with roasted vegetables","Vegetable curry with millet roti","Paneer tikka with green salad","Lentil and spinach soup","Stir-fried mushrooms and broccoli","Grilled tofu with spinach","Vegetable khichdi with flaxseeds","Low-fat vegetable stew","Masala grilled paneer with salad","Zucchini and carrot noodles","Vegetable stir fry with quinoa"]
-        },
-        "General Health": {
-            "Breakfast": ["Oats","Idli","Dosa","Poha","Upma","Toast","Smoothie"],
-            "Lunch": ["Dal Rice","Chapati Curry","Khichdi","Quinoa Bowl","Paneer","Salad","Veg Biryani"],
-            "Snacks": ["Fruits","Nuts","Sprouts","Yogurt","Seeds","Protein Shake","Roasted Chana"],
-            "Dinner": ["Soup","Salad","Grilled Veg","Paneer","Tofu","Zoodles","Light Curry"]
-        }
-    }
+    key = (hashlib.sha256(data).hexdigest(), ext, diet_type, int(seed))
 
-    # -------------------- Non-Vegetarian Meals --------------------
-    nonveg_meals = {
-        "Diabetes": {
-            "Breakfast": ["Egg white omelette with spinach","Oats with milk and nuts","Smoothie with protein powder","Boiled eggs with tomato","Poha with eggs","Masala oats with milk","Whole wheat toast with boiled egg","Quinoa porridge with almonds","Vegetable and egg chilla","Scrambled eggs with vegetables"],
-            "Lunch": ["Grilled chicken with brown rice","Fish curry with steamed vegetables","Egg curry with chapati","Grilled salmon with quinoa","Chicken salad with olive oil","Tuna salad with veggies","Egg bhurji with roti","Baked fish with vegetables","Chicken stir fry with broccoli","Seafood soup with millet"],
-            "Snacks": ["Boiled eggs","Chicken salad","Greek yogurt with nuts","Protein shake","Roasted chickpeas","Cottage cheese with fruits","Carrot sticks with hummus","Edamame beans","Mixed nuts","Celery sticks with peanut butter"],
-            "Dinner": ["Grilled chicken with vegetables","Baked fish with asparagus","Egg curry with spinach","Seafood stir fry","Chicken soup with vegetables","Tuna steak with roasted veggies","Grilled salmon with zucchini noodles","Low-fat chicken curry","Vegetable and egg stir fry","Baked fish with cauliflower rice"]
-        },
-        "High Cholesterol": {
-            "Breakfast": ["Egg omelette with vegetables","Scrambled eggs with spinach","Boiled eggs with toast","Protein smoothie with milk","Egg white omelette","Oats with milk and nuts","Masala oats with egg","Quinoa porridge with eggs","Whole wheat toast with boiled eggs","Vegetable egg chilla"],
-            "Lunch": ["Grilled chicken salad","Baked fish with vegetables","Egg curry with chapati","Tuna salad with olive oil","Chicken stir fry with brown rice","Grilled salmon with quinoa","Egg bhurji with roti","Seafood soup with vegetables","Baked fish with asparagus","Low-fat chicken curry"],
-            "Snacks": ["Boiled eggs","Chicken salad","Protein shake","Greek yogurt with nuts","Roasted chickpeas","Cottage cheese with fruits","Carrot sticks with hummus","Edamame beans","Mixed nuts","Celery sticks with peanut butter"],
-            "Dinner": ["Grilled chicken with vegetables","Baked fish with zucchini noodles","Egg curry with spinach","Seafood stir fry","Chicken soup with vegetables","Tuna steak with roasted veggies","Grilled salmon with roasted vegetables","Low-fat chicken curry","Vegetable and egg stir fry","Baked fish with cauliflower rice"]
-        },
-        "General Health": {
-            "Breakfast": ["Eggs","Oats with milk","Chicken Sausage","Scrambled Eggs","Protein Shake"],
-            "Lunch": ["Grilled Chicken","Egg Curry with Rice","Fish Curry","Chicken Salad","Tuna Sandwich"],
-            "Snacks": ["Boiled Eggs","Chicken Slices","Protein Shake","Greek Yogurt","Nuts with Cheese"],
-            "Dinner": ["Grilled Chicken","Fish Curry with Veggies","Egg Stir Fry","Chicken Soup","Baked Fish"]
-        }
-    }
+    job = st.session_state.get("plan_job")
+    if job is not None and job["key"] == key and not job.get("retry"):
+        return job
 
-    # -------------------- Determine Condition --------------------
-    if "diabetes" in text:
-        condition = "Diabetes"
-        avoid = ["Sugar", "White rice", "Soft drinks", "Sweets", "Refined flour"]
-    elif "cholesterol" in text:
-        condition = "High Cholesterol"
-        avoid = ["Fried food", "Butter", "Red meat", "Full-fat dairy", "Processed snacks"]
-    else:
-        condition = "General Health"
-        avoid = ["Junk food", "Excess sugar"]
-
-    # -------------------- Pick Meals Based on Diet Type --------------------
-    if diet_type == "Veg":
-        meals = veg_meals[condition]
-    else:
-        meals = nonveg_meals[condition]
-
-    # -------------------- Lifestyle Advice --------------------
-    lifestyle = [
-        "Exercise at least 30 minutes daily",
-        "Drink 2–3 liters of water",
-        "Sleep 7–8 hours daily",
-        "Limit processed and high-fat foods"
-    ]
-
-    # -------------------- Generate 7-day plan --------------------
-    days = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
-    breakfast_plan = random.sample(meals["Breakfast"], min(7, len(meals["Breakfast"])))
-    lunch_plan = random.sample(meals["Lunch"], min(7, len(meals["Lunch"])))
-    snacks_plan = random.sample(meals["Snacks"], min(7, len(meals["Snacks"])))
-    dinner_plan = random.sample(meals["Dinner"], min(7, len(meals["Dinner"])))
-
-    df = pd.DataFrame({
-        "Day": days,
-        "Breakfast": breakfast_plan,
-        "Lunch": lunch_plan,
-        "Snacks": snacks_plan,
-        "Dinner": dinner_plan
-    })
-
-    return condition, avoid, lifestyle, df
-
-# -------------------- PDF GENERATOR --------------------
-def generate_diet_pdf(name, age, condition, diet_type, avoid, lifestyle, diet_df):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    elements.append(Paragraph("<b>AI Diet Planner – 7 Day Diet Plan</b>", styles["Title"]))
-    elements.append(Paragraph("<br/>", styles["Normal"]))
-
-    elements.append(Paragraph(f"Name: {name}", styles["Normal"]))
-    elements.append(Paragraph(f"Age: {age}", styles["Normal"]))
-    elements.append(Paragraph(f"Condition: {condition}", styles["Normal"]))
-    elements.append(Paragraph(f"Diet Type: {diet_type}", styles["Normal"]))
-    elements.append(Paragraph("<br/>", styles["Normal"]))
-
-    for _, row in diet_df.iterrows():
-        elements.append(Paragraph(
-            f"<b>{row['Day']}</b><br/>"
-            f"Breakfast: {row['Breakfast']}<br/>"
-            f"Lunch: {row['Lunch']}<br/>"
-            f"Snacks: {row['Snacks']}<br/>"
-            f"Dinner: {row['Dinner']}<br/><br/>",
-            styles["Normal"]
-        ))
-
-    elements.append(Paragraph("<b>Foods to Avoid</b>", styles["Heading2"]))
-    elements.append(Paragraph(", ".join(avoid), styles["Normal"]))
-
-    elements.append(Paragraph("<br/><b>Lifestyle Recommendations</b>", styles["Heading2"]))
-    for l in lifestyle:
-        elements.append(Paragraph(f"• {l}", styles["Normal"]))
-
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    status = {"stage": "Queued", "fraction": 0.0}
+    def progress(stage, fraction):
+        status.update(stage=stage, fraction=fraction)
+
+    job = {
+        "key": key,
+        "data": data,
+        "status": status,
+        "future": plan_executor().submit(build_plan, *key, data, progress)
+    }
+    st.session_state["plan_job"] = job
+    return job
+
+def wait_for(job):
+    future = job["future"]
+    if not future.done():
+        bar = st.progress(0.0, text=job["status"]["stage"])
+        while not future.done():
+            bar.progress(job["status"]["fraction"], text=job["status"]["stage"])
+            time.sleep(0.1)
+        bar.empty()
+    result = future.result()
+    if result.get("timed_out") and not job.get("retry"):
+        # Don't keep a plan built from partial OCR text: the next
+        # "Generate" runs the report again.
+        build_plan.clear(*job["key"], job["data"])
+        job["retry"] = True
+    return result
 
 # -------------------- USER INPUT --------------------
-uploaded_file = st.file_uploader("📄 Upload Medical Report", type=["pdf","png","jpg","jpeg","txt","csv"])
+uploaded_file = st.file_uploader("📄 Upload Medical Report", type=list(SUPPORTED_EXTENSIONS))
 diet_type = st.selectbox("🥦 Select Diet Type", ["Veg","Non-Veg"])
-
-if st.button("🍽 Generate Diet Plan") and uploaded_file:
-
-    text = extract_text(uploaded_file)
-    name, age = extract_patient_info(text)
-    condition, avoid, lifestyle, diet_df = generate_diet(text, diet_type)
+seed = st.number_input("🎲 Plan Variant", min_value=0, value=0, step=1)
+
+if uploaded_file is None:
+    st.session_state.pop("plan_job", None)
+elif st.button("🍽 Generate Diet Plan"):
+    submit_plan(uploaded_file, diet_type, seed)
+
+job = st.session_state.get("plan_job")
+if job is not None:
+
+    try:
+        result = wait_for(job)
+    except Exception as exc:
+        st.session_state.pop("plan_job", None)
+        st.error(f"Could not generate a diet plan: {exc}")
+        st.stop()
+
+    if result.get("timed_out"):
+        st.warning("Text recognition timed out on part of this report, so the plan may be "
+                   "generic. Click Generate again to retry.")
+
+    name, age = result["name"], result["age"]
+    diet_type = result["diet_type"]
+    condition, avoid, lifestyle = result["condition"], result["avoid"], result["lifestyle"]
+    diet_df = result["diet_df"]
+    # Only structured (CSV) reports are scored by the health risk model.
+    risk_status = result.get("risk_status")
+    risk_html = f"<br><b>Health Risk:</b> {risk_status}" if risk_status is not None else ""
 
     st.markdown(f"""
     <div class="info-card">
@@ -261,7 +184,7 @@ if st.button("🍽 Generate Diet Plan") and uploaded_file:
         <b>Name:</b> {name}<br>
         <b>Age:</b> {age}<br>
         <b>Condition:</b> {condition}<br>
-        <b>Diet Type:</b> {diet_type}
+        <b>Diet Type:</b> {diet_type}{risk_html}
     </div>
     """, unsafe_allow_html=True)
 
@@ -300,7 +223,8 @@ if st.button("🍽 Generate Diet Plan") and uploaded_file:
     </div>
     """, unsafe_allow_html=True)
 
-    pdf_file = generate_diet_pdf(name, age, condition, diet_type, avoid, lifestyle, diet_df)
-
-    st.download_button("📄 Download Diet Plan PDF", pdf_file, "AI_Diet_Plan.pdf", mime="application/pdf")
-    st.download_button("📥 Download Diet Plan JSON", json.dumps(diet_df.to_dict(), indent=4), "diet_plan.json")
\ No newline at end of file
+    # Built on click (in a separate thread), not on every rerun.
+    st.download_button("📄 Download Diet Plan PDF", lambda: build_pdf(*job["key"], job["data"]),
+                       "AI_Diet_Plan.pdf", mime="application/pdf", on_click="ignore")
+    st.download_button("📥 Download Diet Plan JSON", lambda: build_json(*job["key"], job["data"]),
+                       "diet_plan.json", mime="application/json", on_click="ignore")
\ No newline at end of file
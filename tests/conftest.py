@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Keep the tests away from the user's extraction cache. Must run before
+# utils.extraction_cache is imported; the directory goes away at exit.
+_cache_dir = tempfile.TemporaryDirectory(prefix="diet_tests_")
+os.environ.setdefault("DIET_EXTRACTION_CACHE", os.path.join(_cache_dir.name, "extraction.sqlite"))
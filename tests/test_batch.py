@@ -0,0 +1,118 @@
+import http.client
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from utils import batch
+
+REPORT = b"Patient Name: Ravi Kumar\nAge: 45\nKnown diabetes, total cholesterol 240\n"
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # The real handler over a thread pool, so process_bytes can be swapped
+    # for a job that blocks until the test releases it.
+    release = threading.Event()
+    release.set()
+
+    def process_bytes(data, filename, diet_type, output_format):
+        release.wait(10)
+        return json.dumps({"diet_type": diet_type}).encode("utf-8"), "application/json", {}
+
+    monkeypatch.setattr(batch, "process_bytes", process_bytes)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), batch.PlanRequestHandler)
+    httpd.pool = ThreadPoolExecutor(max_workers=2)
+    httpd.slots = threading.BoundedSemaphore(1)
+    httpd.request_timeout = 0.2
+    httpd.metrics_path = None
+    httpd.max_body_bytes = 1024
+    httpd.release = release
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    release.set()
+    httpd.shutdown()
+    httpd.server_close()
+    httpd.pool.shutdown()
+
+
+def post(server, query="filename=report.txt", body=REPORT, headers=None, timeout=10):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=timeout)
+    conn.putrequest("POST", f"/plan?{query}")
+    for name, value in (headers or {"Content-Length": str(len(body))}).items():
+        conn.putheader(name, value)
+    conn.endheaders()
+    conn.send(body)
+    response = conn.getresponse()
+    status, payload = response.status, response.read()
+    conn.close()
+    return status, payload
+
+
+def test_plan_request(server):
+    status, payload = post(server, "filename=report.txt&diet_type=Non-Veg")
+    assert status == 200
+    assert json.loads(payload) == {"diet_type": "Non-Veg"}
+
+
+def test_unknown_diet_type_is_rejected(server):
+    status, payload = post(server, "filename=report.txt&diet_type=Keto")
+    assert status == 400
+    assert "Keto" in json.loads(payload)["error"]
+
+
+def test_malformed_content_length_is_rejected(server):
+    status, _ = post(server, body=b"", headers={"Content-Length": "abc"})
+    assert status == 400
+
+
+def test_slot_is_held_until_a_timed_out_job_finishes(server):
+    server.release.clear()
+    assert post(server)[0] == 504  # timed out, job still running
+    assert post(server)[0] == 503  # its slot is still taken
+
+    server.release.set()
+    server.pool.submit(lambda: None).result()
+    for _ in range(50):
+        status, _ = post(server)
+        if status != 503:
+            break
+    assert status == 200
+
+
+def test_oversized_body_is_rejected_unread(server):
+    # Content-Length claims more than is sent: reading it would hang.
+    status, _ = post(server, body=b"", headers={"Content-Length": str(10**9)}, timeout=2)
+    assert status == 413
+
+
+def test_full_queue_rejects_without_reading_the_body(server):
+    server.release.clear()
+    assert post(server)[0] == 504
+    for query in ("filename=report.txt", "filename=report.doc", "diet_type=Keto"):
+        status, _ = post(server, query, body=b"", headers={"Content-Length": "500"}, timeout=2)
+        assert status in (400, 503)
+
+
+def test_same_named_reports_get_distinct_outputs(tmp_path):
+    for sub in ("a", "b"):
+        os.makedirs(tmp_path / sub)
+        (tmp_path / sub / "report.txt").write_bytes(REPORT)
+    paths = [str(tmp_path / "a" / "report.txt"), str(tmp_path / "b" / "report.txt")]
+    names = batch.output_names(paths)
+    assert names == ["a__report.txt", "b__report.txt"]
+
+    out = tmp_path / "out"
+    os.makedirs(out)
+    for path, name in zip(paths, names):
+        assert batch.process_path(path, "Veg", str(out), write_pdf=False, output_name=name)["status"] == "ok"
+    assert sorted(os.listdir(out)) == ["a__report.txt.plan.json", "b__report.txt.plan.json"]
+
+
+def test_directory_of_reports_keeps_bare_names(tmp_path):
+    paths = [str(tmp_path / "x.txt"), str(tmp_path / "y.pdf")]
+    assert batch.output_names(paths) == ["x.txt", "y.pdf"]
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from benchmarks.corpus import write_csv, write_model
+from utils.bulk_ingest import ingest_csv
+from utils.train_lightgbm import DEFAULT_MODEL_FILE
+
+
+class _QuietProgress:
+    def update(self, rows):
+        pass
+
+    def report(self):
+        pass
+
+
+@pytest.fixture
+def patients(tmp_path):
+    path = tmp_path / "patients.csv"
+    write_csv(str(path), seed=1, rows=250)
+    return str(path)
+
+
+def _rows(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_scores_with_a_model_trained_on_the_features(patients, tmp_path):
+    model = str(tmp_path / "model.txt")
+    write_model(model, seed=1, rows=500)
+    out = str(tmp_path / "out.jsonl")
+    ingest_csv(patients, out, model, chunksize=100, progress=_QuietProgress())
+
+    rows = _rows(out)
+    assert [r["row"] for r in rows] == list(range(250))
+    assert all(r["status"] in ("Normal", "Abnormal") for r in rows)
+    assert all(0.0 <= r["risk_probability"] <= 1.0 for r in rows)
+
+
+def test_default_model_with_other_features_writes_unscored_rows(patients, tmp_path, capsys):
+    out = str(tmp_path / "out.jsonl")
+    ingest_csv(patients, out, DEFAULT_MODEL_FILE, chunksize=100, progress=_QuietProgress())
+
+    rows = _rows(out)
+    assert len(rows) == 250
+    assert all(r["status"] is None and r["risk_probability"] is None for r in rows)
+    assert all(r["medical_info"] and r["diet"] for r in rows)
+    assert "warning" in capsys.readouterr().err
@@ -0,0 +1,78 @@
+import json
+import os
+import re
+
+import pytest
+
+from benchmarks.corpus import report_pages
+from utils.Extraction import MEDICAL_FIELDS, extract_medical_info, extract_medical_info_bulk
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def baseline_extract_medical_info(text):
+    # extract_medical_info before the single-pass scanner, kept verbatim as
+    # the reference for the fields it covered (blood_pressure came later).
+    results = {}
+    text_clean = " ".join(text.split())
+
+    name_match = re.search(
+        r"Patient Name[:\-]?\s*([A-Za-z]{2,20}\s+[A-Za-z]{2,20})",
+        text_clean,
+        re.IGNORECASE
+    )
+    results["name"] = name_match.group(1) if name_match else ""
+
+    age_match = re.search(r"Age[:\- ]+(\d{1,3})", text_clean)
+    results["age"] = int(age_match.group(1)) if age_match else ""
+
+    sex_match = re.search(r"(Male|Female|M|F)", text_clean, re.IGNORECASE)
+    results["sex"] = sex_match.group(1) if sex_match else ""
+
+    patterns = {
+        "bmi": r"BMI[:\-]?\s*(\d+\.?\d*)",
+        "blood_sugar": r"(Glucose|Blood Sugar)[^\d]*(\d+\.?\d*)",
+        "cholesterol": r"Cholesterol[^\d]*(\d+\.?\d*)",
+        "hemoglobin": r"(Hb|Hemoglobin)[^\d]*(\d+\.?\d*)"
+    }
+
+    for key, pattern in patterns.items():
+        m = re.search(pattern, text_clean, re.IGNORECASE)
+        results[key] = m.group(2) if m and len(m.groups()) > 1 else (m.group(1) if m else "")
+
+    return results
+
+
+def load_corpus():
+    with open(os.path.join(FIXTURES, "medical_fragments.json"), encoding="utf-8") as fh:
+        fragments = json.load(fh)
+    reports = ["\n".join("\n".join(page) for page in report_pages(seed, 3)) for seed in range(50)]
+    return fragments + reports
+
+
+CORPUS = load_corpus()
+
+
+def test_matches_baseline_on_fixture_corpus():
+    for text in CORPUS:
+        expected = baseline_extract_medical_info(text)
+        found = extract_medical_info(text)
+        assert {k: found[k] for k in expected} == expected, text
+
+
+@pytest.mark.parametrize("text, field, value", [
+    ("BMİ 24", "bmi", "24"),
+    ("HEMOGLOBİN 12", "hemoglobin", "12"),
+    ("PATİENT NAME Ali Veli", "name", "Ali Veli"),
+])
+def test_non_ascii_case_changes(text, field, value):
+    assert extract_medical_info(text)[field] == value
+    assert baseline_extract_medical_info(text)[field] == value
+
+
+def test_bulk_matches_single():
+    texts = CORPUS[:200] + [None, float("nan")]
+    assert extract_medical_info_bulk(texts) == [
+        extract_medical_info(t if isinstance(t, str) else "") for t in texts
+    ]
+    assert set(extract_medical_info("")) == set(MEDICAL_FIELDS)
@@ -0,0 +1,68 @@
+import sqlite3
+
+from utils.extraction_cache import ExtractionCache, cache_key
+
+
+def _sizes(path):
+    conn = sqlite3.connect(path)
+    try:
+        total = conn.execute("SELECT total FROM stats").fetchone()[0]
+        actual = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    finally:
+        conn.close()
+    return total, actual, count
+
+
+def test_hits_are_copies(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ExtractionCache(path)
+    key = cache_key(b"report", "txt")
+    cache.put(key, {"text": "original", "pages": [1, 2]})
+
+    hit = cache.get(key)
+    hit["text"] = "MUTATED"
+    hit["pages"].append(3)
+    assert cache.get(key) == {"text": "original", "pages": [1, 2]}
+
+    # disk hit in a fresh process-level cache
+    other = ExtractionCache(path)
+    hit = other.get(key)
+    hit["text"] = "MUTATED"
+    assert other.get(key)["text"] == "original"
+
+
+def test_running_total_tracks_puts_replaces_and_evictions(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ExtractionCache(path, max_bytes=10_000, memory_entries=4)
+    for i in range(200):
+        cache.put(cache_key(str(i).encode(), "txt"), {"text": "x" * (i % 90)})
+    # replacing a key with a different size
+    for i in range(0, 200, 7):
+        cache.put(cache_key(str(i).encode(), "txt"), {"text": "y" * 150})
+
+    total, actual, count = _sizes(path)
+    assert total == actual
+    assert 0 < total <= 10_000
+    assert 0 < count < 200
+
+    cache.clear()
+    assert _sizes(path) == (0, 0, 0)
+
+
+def test_total_is_initialised_for_an_existing_cache_file(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+        "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO entries VALUES ('old', '\"text\"', 6, 0)")
+    conn.commit()
+    conn.close()
+
+    cache = ExtractionCache(path)
+    assert cache.get("old") == "text"
+    cache.put("new", "abc")
+    total, actual, count = _sizes(path)
+    assert (total, actual, count) == (11, 11, 2)
@@ -0,0 +1,86 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.corpus import write_csv, write_model
+from utils.train_lightgbm import FEATURES, HealthRiskAnalyzer
+
+
+@pytest.fixture(scope="module")
+def records(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data") / "patients.csv"
+    write_csv(str(path), seed=3, rows=300)
+    frame = pd.read_csv(path)
+    return frame[list(FEATURES)]
+
+
+@pytest.fixture(scope="module", params=["native", "pickled"])
+def model_file(request, tmp_path_factory):
+    directory = tmp_path_factory.mktemp("model")
+    if request.param == "native":
+        path = str(directory / "model.txt")
+        write_model(path, seed=3, rows=2000)
+        return path
+
+    from lightgbm import LGBMClassifier
+
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame({
+        "age": rng.integers(18, 86, 2000),
+        "glucose": rng.integers(70, 261, 2000),
+        "cholesterol": rng.integers(120, 321, 2000),
+        "blood_pressure": rng.integers(100, 181, 2000),
+        "bmi": rng.uniform(17, 38, 2000),
+    }).astype(float)
+    y = ((X["glucose"] > 140) | (X["bmi"] > 30)).astype(int)
+    model = LGBMClassifier(n_estimators=30, max_depth=3, learning_rate=0.1, verbose=-1).fit(X, y)
+    path = str(directory / "model.pkl")
+    joblib.dump(model, path)
+    return path
+
+
+@pytest.fixture(params=["dicts", "frame", "array"])
+def batch_input(request, records):
+    if request.param == "dicts":
+        return records.to_dict("records")
+    if request.param == "frame":
+        return records
+    return records.to_numpy(dtype=np.float64)
+
+
+@pytest.mark.parametrize("batch_size", [None, 7])
+def test_batch_matches_single_row_analyze(model_file, records, batch_input, batch_size):
+    analyzer = HealthRiskAnalyzer(model_file)
+    labels, probabilities = analyzer.analyze_batch(batch_input, batch_size=batch_size)
+
+    expected = [analyzer.analyze(row) for row in records.to_dict("records")]
+    assert list(labels) == expected
+    assert len(probabilities) == len(records)
+    assert np.all((probabilities >= 0) & (probabilities <= 1))
+    # the positive-class probability agrees with the label
+    assert np.array_equal(probabilities >= 0.5, labels == "Abnormal")
+
+
+def test_batch_size_does_not_change_results(model_file, records):
+    analyzer = HealthRiskAnalyzer(model_file)
+    whole = analyzer.analyze_batch(records)
+    chunked = analyzer.analyze_batch(records, batch_size=1)
+    assert list(whole[0]) == list(chunked[0])
+    np.testing.assert_allclose(whole[1], chunked[1])
+
+
+@pytest.mark.parametrize("empty", [
+    [],
+    pd.DataFrame(columns=list(FEATURES)),
+    np.empty((0, len(FEATURES))),
+])
+def test_empty_input(model_file, empty):
+    labels, probabilities = HealthRiskAnalyzer(model_file).analyze_batch(empty)
+    assert len(labels) == 0
+    assert len(probabilities) == 0
+
+
+def test_wrong_number_of_columns(model_file):
+    with pytest.raises(ValueError):
+        HealthRiskAnalyzer(model_file).analyze_batch(np.zeros((3, 4)))
@@ -0,0 +1,70 @@
+import json
+import threading
+
+import pytest
+
+from utils import metrics
+
+
+@pytest.fixture
+def enabled():
+    was_enabled = metrics.enabled()
+    metrics.enable()
+    metrics.reset()
+    yield
+    metrics.reset()
+    if not was_enabled:
+        metrics.disable()
+
+
+def test_concurrent_exports_and_autosaves(enabled, tmp_path):
+    path = str(tmp_path / "metrics.json")
+    errors = []
+    start = threading.Barrier(16)
+
+    def worker(i):
+        try:
+            start.wait()
+            for _ in range(20):
+                with metrics.stage("analyze", "csv"):
+                    pass
+                metrics.count("reports_processed", 1, "txt")
+                if i % 2:
+                    metrics.export(path)
+                else:
+                    metrics.autosave(force=True, path=path)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    metrics.export(path)
+    with open(path, encoding="utf-8") as fh:
+        snapshot = json.load(fh)
+    assert snapshot["counters"] == [{"name": "reports_processed", "file_type": "txt", "value": 320}]
+    assert snapshot["stages"][0]["count"] == 320
+    assert list(tmp_path.iterdir()) == [tmp_path / "metrics.json"]
+
+
+def test_autosave_is_rate_limited(enabled, tmp_path):
+    path = str(tmp_path / "metrics.prom")
+    assert metrics.autosave(force=True, path=path) == path
+    assert metrics.autosave(path=path) is None
+
+
+def test_drain_and_merge_round_trip(enabled):
+    with metrics.stage("extract_text", "pdf"):
+        pass
+    metrics.count("bytes_processed", 10, "pdf")
+    state = metrics.drain()
+    assert metrics.snapshot() == {"stages": [], "counters": []}
+    metrics.merge(state)
+    metrics.merge(state)
+    snap = metrics.snapshot()
+    assert snap["stages"][0]["count"] == 2
+    assert snap["counters"][0]["value"] == 20
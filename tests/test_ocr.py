@@ -0,0 +1,58 @@
+import io
+
+import pytest
+from PIL import Image
+
+from utils.ocr import preprocess
+
+
+def _scan(fmt, size=(4000, 3000), dpi=600):
+    buffer = io.BytesIO()
+    Image.new("L", size, 255).save(buffer, format=fmt, dpi=(dpi, dpi))
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+@pytest.mark.parametrize("fmt", ["JPEG", "PNG"])
+def test_high_dpi_scan_is_downscaled_to_target_dpi_once(fmt):
+    processed, _ = preprocess(_scan(fmt), crop=False)
+    assert processed.size == (2000, 1500)
+
+
+def test_large_low_dpi_image_is_capped_at_max_side():
+    processed, _ = preprocess(_scan("JPEG", size=(4960, 3508), dpi=72), crop=False)
+    assert processed.size == (2480, 1754)
+
+
+def test_timed_out_ocr_is_reported_and_not_cached(monkeypatch):
+    import pytesseract
+
+    from utils import pipeline
+
+    calls = []
+
+    def image_to_string(image, lang=None, timeout=None):
+        calls.append(timeout)
+        if len(calls) == 1:
+            raise RuntimeError("Tesseract process timeout")
+        return "Patient Name: Ravi Kumar\nAge: 45\nKnown diabetes\n"
+
+    monkeypatch.setattr(pytesseract, "image_to_string", image_to_string)
+    buffer = io.BytesIO()
+    # unique content, so no earlier cache entry can answer for it
+    Image.new("L", (64, 64), 200).save(buffer, format="PNG")
+    data = buffer.getvalue() + b"timeout-test"
+
+    first = pipeline.process_report(pipeline.ReportFile(data, "scan.png"))
+    assert first["timed_out"] is True
+    assert first["age"] == "Not Found"
+
+    second = pipeline.process_report(pipeline.ReportFile(data, "scan.png"))
+    assert len(calls) == 2
+    assert second["timed_out"] is False
+    assert second["age"] == "45"
+    assert "Diabetes" in second["condition"]
+
+    # the complete report is cached
+    pipeline.process_report(pipeline.ReportFile(data, "scan.png"))
+    assert len(calls) == 2
@@ -0,0 +1,54 @@
+import itertools
+
+import pytest
+
+from utils.meal_catalog import get_catalog
+from utils.planner import WeeklyPlanner
+
+CATALOG = get_catalog()
+RESTRICTIONS = [
+    combo
+    for n in range(len(CATALOG._restrictions) + 1)
+    for combo in itertools.combinations(sorted(CATALOG._restrictions), n)
+]
+CONDITIONS = [
+    combo
+    for n in range(1, len(CATALOG.conditions) + 1)
+    for combo in itertools.combinations(CATALOG.conditions, n)
+]
+
+
+@pytest.mark.parametrize("diet_type", CATALOG.diet_types)
+@pytest.mark.parametrize("conditions", CONDITIONS)
+def test_no_repeats_when_the_pools_allow(diet_type, conditions):
+    planner = WeeklyPlanner(CATALOG)
+    for restrictions in RESTRICTIONS:
+        for slot in CATALOG.slots:
+            union = {
+                meal
+                for condition in conditions
+                for meal in CATALOG.restricted(CATALOG.meals(diet_type, condition, slot), restrictions)
+            }
+            if len(union) < planner.days:
+                continue
+            plans = planner.plan_batch(diet_type, conditions, range(20), restrictions)
+            for row in plans[slot]:
+                assert len(set(row)) == planner.days, (conditions, restrictions, slot, list(row))
+
+
+def test_restricted_meals_are_never_planned():
+    planner = WeeklyPlanner(CATALOG)
+    conditions = CATALOG.match_conditions("known diabetes, total cholesterol 240")
+    restrictions = planner.requirements("known diabetes, total cholesterol 240")[1]
+    plans = planner.plan_batch("Veg", conditions, range(20), restrictions)
+    for slot in CATALOG.slots:
+        meals = set(plans[slot].ravel())
+        assert meals == set(CATALOG.restricted(meals, restrictions))
+
+
+def test_same_seed_same_plan_alone_or_in_a_batch():
+    planner = WeeklyPlanner(CATALOG)
+    batch = planner.plan_batch("Veg", ("Diabetes",), [3, 7, 11])
+    single = planner.plan("Veg", ("Diabetes",), seed=7)
+    for slot in CATALOG.slots:
+        assert batch[slot][1].tolist() == single[slot]
@@ -0,0 +1,95 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.corpus import write_csv
+from utils.train_lightgbm import (
+    FEATURES, HealthRiskAnalyzer, build_dataset, latest_version, resolve_model_file, train
+)
+
+PARAMS = {"seed": 1, "deterministic": True, "min_data_in_leaf": 5}
+
+
+def _labelled_csv(path, seed, rows):
+    write_csv(str(path), seed, rows)
+    frame = pd.read_csv(path)
+    frame["label"] = ((frame["glucose"] > 140) | (frame["cholesterol"] > 240)).astype(int)
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def batches(tmp_path):
+    return (_labelled_csv(tmp_path / "a.csv", 1, 2000),
+            _labelled_csv(tmp_path / "b.csv", 2, 3000))
+
+
+def _metadata(version_dir):
+    with open(os.path.join(version_dir, "metadata.json"), encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def test_build_dataset_bins_every_row(batches, tmp_path):
+    import lightgbm as lgb
+
+    out = str(tmp_path / "a.bin")
+    info = build_dataset([batches[0]], out, chunksize=300, threads=1)
+    assert info["rows"] == 2000
+    assert lgb.Dataset(out).construct().num_data() == 2000
+
+
+def test_cold_then_warm_start_keeps_each_versions_dataset(batches, tmp_path):
+    import lightgbm as lgb
+
+    root = str(tmp_path / "artifacts")
+    first = train([batches[0]], root, rounds=5, params=PARAMS, threads=1, chunksize=700)
+    second = train([batches[1]], root, rounds=5, warm_start=True, params=PARAMS, threads=1)
+
+    assert latest_version(root) == "v0002"
+    assert second["parent"] == "v0001"
+    assert second["num_trees"] == first["num_trees"] + 5
+
+    # Same process, same second: each version still has its own dataset.
+    v1, v2 = _metadata(first["path"]), _metadata(second["path"])
+    assert v1["dataset"] != v2["dataset"]
+    assert lgb.Dataset(v1["dataset"]).construct().num_data() == 2000
+    assert lgb.Dataset(v2["dataset"]).construct().num_data() == 3000
+    # The warm start reused the first batch's bins.
+    assert v2["reference_dataset"] == v1["dataset"]
+
+
+def test_retrain_from_saved_dataset(batches, tmp_path):
+    root = str(tmp_path / "artifacts")
+    first = train([batches[0]], root, rounds=5, params=PARAMS, threads=1)
+    again = train([first["dataset"]], root, rounds=5, params=PARAMS, threads=1)
+    assert again["rows"] == 2000
+    assert again["parent"] is None
+
+
+def test_warm_start_rejects_a_binary_dataset(batches, tmp_path):
+    root = str(tmp_path / "artifacts")
+    first = train([batches[0]], root, rounds=2, params=PARAMS, threads=1)
+    with pytest.raises(ValueError):
+        train([first["dataset"]], root, rounds=2, warm_start=True, params=PARAMS, threads=1)
+
+
+def test_analyzer_loads_the_latest_published_version(batches, tmp_path):
+    root = str(tmp_path / "artifacts")
+    train([batches[0]], root, rounds=5, params=PARAMS, threads=1)
+    train([batches[1]], root, rounds=5, warm_start=True, params=PARAMS, threads=1)
+    assert resolve_model_file(root) == os.path.join(root, "v0002", "model.txt")
+
+    analyzer = HealthRiskAnalyzer(root)
+    assert analyzer.accepts_features()
+    frame = pd.read_csv(batches[1])
+    labels, probabilities = analyzer.analyze_batch(frame)
+    assert len(labels) == len(frame)
+    assert set(labels) <= {"Normal", "Abnormal"}
+    assert np.all((probabilities >= 0) & (probabilities <= 1))
+    # the model learned something about its own training batch
+    accuracy = np.mean((labels == "Abnormal") == frame["label"].astype(bool))
+    assert accuracy > 0.8
+    assert analyzer.analyze(frame.iloc[0][list(FEATURES)].to_dict()) == labels[0]
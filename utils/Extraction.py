@@ -1,70 +1,423 @@
-import pdfplumber
-import pytesseract
-from PIL import Image
-import pandas as pd
+import codecs
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import re
+import unicodedata
+from functools import lru_cache
+
+from utils import metrics
+from utils.extraction_cache import cache_key, get_default_cache
+
+# pdfplumber, pandas and the OCR stack are imported inside the branch that
+# needs them, so a plain-text request never pays for loading them.
+
+MEDICAL_FIELDS = (
+    "name", "age", "sex", "bmi", "blood_sugar", "cholesterol", "hemoglobin", "blood_pressure"
+)
+
+# Below this many pages the process pool start-up costs more than it saves.
+PARALLEL_PAGE_THRESHOLD = 16
+DEFAULT_PDF_WORKERS = min(4, os.cpu_count() or 1)
 
 # --------------------------------------------------
-# REGEX MEDICAL INFO EXTRACTION
+# SINGLE-PASS MEDICAL INFO EXTRACTION
 # --------------------------------------------------
+# One scanner walks the lowercased text looking for any field keyword; the
+# field's value pattern is then anchored at that keyword with .match() on
+# the original text. Scanning resumes one character after each hit so
+# overlapping keywords are not lost, and whitespace runs are matched with
+# \s instead of re-joining the text first.
+_FIELD_KEYWORDS = {
+    "name": (r"patient\s+name",),
+    "age": (r"age",),
+    "sex": (r"m", r"f"),
+    "bmi": (r"bmi",),
+    "blood_sugar": (r"glucose", r"blood\s+sugar"),
+    "cholesterol": (r"cholesterol",),
+    "hemoglobin": (r"hb", r"hemoglobin"),
+    "blood_pressure": (r"blood\s+pressure", r"bp"),
+}
+
+_FIELD_VALUES = {
+    "name": re.compile(r"patient\s+name[:\-]?\s*([A-Za-z]{2,20}\s+[A-Za-z]{2,20})", re.IGNORECASE),
+    "age": re.compile(r"Age[:\-\s]+(\d{1,3})"),
+    "sex": re.compile(r"(Male|Female|M|F)", re.IGNORECASE),
+    "bmi": re.compile(r"BMI[:\-]?\s*(\d+\.?\d*)", re.IGNORECASE),
+    "blood_sugar": re.compile(r"(?:Glucose|Blood\s+Sugar)[^\d]*(\d+\.?\d*)", re.IGNORECASE),
+    "cholesterol": re.compile(r"Cholesterol[^\d]*(\d+\.?\d*)", re.IGNORECASE),
+    "hemoglobin": re.compile(r"(?:Hb|Hemoglobin)[^\d]*(\d+\.?\d*)", re.IGNORECASE),
+    "blood_pressure": re.compile(r"(?:Blood\s+Pressure|BP)[^\d]*(\d{2,3})(?:\s*/\s*\d{2,3})?", re.IGNORECASE),
+}
+
+
+@lru_cache(maxsize=None)
+def _field_scanner(fields, ignorecase=False):
+    # A plain alternation of literals lets the regex engine skip ahead on
+    # the first character. Found fields are dropped from the scanner so
+    # frequent keywords (every "m"/"f" for sex) stop producing hits. Each
+    # field is a named group, so a hit maps back to its field whatever the
+    # case of the matched text (e.g. "BMİ" under IGNORECASE).
+    alternation = "|".join(f"(?P<{f}>{'|'.join(_FIELD_KEYWORDS[f])})" for f in fields)
+    return re.compile(alternation, re.IGNORECASE if ignorecase else 0)
+
+
 def extract_medical_info(text):
-    results = {}
-    text_clean = " ".join(text.split())
-
-    # Name
-    name_match = re.search(
-        r"Patient Name[:\-]?\s*([A-Za-z]{2,20}\s+[A-Za-z]{2,20})",
-        text_clean,
-        re.IGNORECASE
-    )
-    results["name"] = name_match.group(1) if name_match else ""
-
-    # Age
-    age_match = re.search(r"Age[:\- ]+(\d{1,3})", text_clean)
-    results["age"] = int(age_match.group(1)) if age_match else ""
-
-    # Gender
-    sex_match = re.search(r"(Male|Female|M|F)", text_clean, re.IGNORECASE)
-    results["sex"] = sex_match.group(1) if sex_match else ""
-
-    # Labs
-    patterns = {
-        "bmi": r"BMI[:\-]?\s*(\d+\.?\d*)",
-        "blood_sugar": r"(Glucose|Blood Sugar)[^\d]*(\d+\.?\d*)",
-        "cholesterol": r"Cholesterol[^\d]*(\d+\.?\d*)",
-        "hemoglobin": r"(Hb|Hemoglobin)[^\d]*(\d+\.?\d*)"
-    }
+    with metrics.stage("extract_medical_info"):
+        return _extract_medical_info(text)
 
-    for key, pattern in patterns.items():
-        m = re.search(pattern, text_clean, re.IGNORECASE)
-        results[key] = m.group(2) if m and len(m.groups()) > 1 else (m.group(1) if m else "")
+
+def _extract_medical_info(text):
+    results = dict.fromkeys(MEDICAL_FIELDS, "")
+    missing = list(MEDICAL_FIELDS)
+
+    haystack = text.lower()
+    # A few characters change length when lowercased; scan those texts as-is.
+    ignorecase = len(haystack) != len(text)
+    if ignorecase:
+        haystack = text
+
+    scanner = _field_scanner(tuple(missing), ignorecase)
+    pos = 0
+
+    while missing:
+        hit = scanner.search(haystack, pos)
+        if hit is None:
+            break
+        pos = hit.start() + 1
+        field = hit.lastgroup
+
+        m = _FIELD_VALUES[field].match(text, hit.start())
+        if m is None:
+            continue
+
+        value = m.group(1)
+        if field == "name":
+            value = " ".join(value.split())
+        elif field == "age":
+            value = int(value)
+        results[field] = value
+
+        missing.remove(field)
+        scanner = _field_scanner(tuple(missing), ignorecase)
 
     return results
 
 
+def extract_medical_info_bulk(texts):
+    return [
+        extract_medical_info(text if isinstance(text, str) else "")
+        for text in texts
+    ]
+
+
 # --------------------------------------------------
-# MAIN EXTRACTOR 
+# STREAMING PDF PAGE EXTRACTION
 # --------------------------------------------------
-def extract_text(uploaded_file):
-    text = ""
-    numeric_data = None
-    file_type = uploaded_file.name.split(".")[-1].lower()
+_worker_pdf = None
+
+
+def _pdf_input(source):
+    # pdfplumber reads a path itself; anything else goes through BytesIO.
+    return source if isinstance(source, str) else io.BytesIO(source)
 
-    if file_type == "pdf":
-        with pdfplumber.open(uploaded_file) as pdf:
+
+def _init_pdf_worker(source):
+    import pdfplumber
+
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(_pdf_input(source))
+
+
+def _extract_page(page):
+    text = page.extract_text() or ""
+    # Drop the cached layout objects so only the page text stays alive.
+    page.close()
+    return text
+
+
+def _extract_worker_page(index):
+    return _extract_page(_worker_pdf.pages[index])
+
+
+def _read_bytes(uploaded_file):
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    data = uploaded_file.read()
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+    return data
+
+
+def _fields_found(page_text, missing):
+    found = extract_medical_info(page_text)
+    missing.difference_update([k for k in missing if found.get(k) != ""])
+    return not missing
+
+
+def iter_pdf_pages(uploaded_file, workers=None, stop_early=False, chunksize=4):
+    # Yields page text in page order. Large documents are fanned out to a
+    # process pool; with stop_early the generator ends once every field
+    # extract_medical_info looks for has been seen. uploaded_file may also
+    # be a path, which workers then open themselves.
+    import pdfplumber
+
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        data = os.fspath(uploaded_file)
+    elif isinstance(uploaded_file, (bytes, bytearray, memoryview, mmap.mmap)):
+        data = bytes(uploaded_file)
+    else:
+        data = _read_bytes(uploaded_file)
+    workers = DEFAULT_PDF_WORKERS if workers is None else workers
+    missing = set(MEDICAL_FIELDS)
+
+    with pdfplumber.open(_pdf_input(data)) as pdf:
+        n_pages = len(pdf.pages)
+        if workers <= 1 or n_pages < PARALLEL_PAGE_THRESHOLD:
             for page in pdf.pages:
-                text += page.extract_text() or ""
+                page_text = _extract_page(page)
+                metrics.count("pages_processed", 1, "pdf")
+                yield page_text
+                if stop_early and _fields_found(page_text, missing):
+                    return
+            return
+
+    pool = ProcessPoolExecutor(
+        max_workers=min(workers, n_pages),
+        initializer=_init_pdf_worker,
+        initargs=(data,)
+    )
+    try:
+        # map() keeps submission order, so pages come back in sequence.
+        for page_text in pool.map(_extract_worker_page, range(n_pages), chunksize=chunksize):
+            metrics.count("pages_processed", 1, "pdf")
+            yield page_text
+            if stop_early and _fields_found(page_text, missing):
+                return
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# --------------------------------------------------
+# NORMALIZED TEXT
+# --------------------------------------------------
+TEXT_BLOCK_SIZE = 1 << 20
+_TRAILING_SPACE = re.compile(r"[ \t]+$", re.MULTILINE)
+
+
+def normalize_text(text):
+    # The one form every handler returns: NFKC (PDF ligatures, full-width
+    # OCR digits), "\n" line endings, no NULs or trailing blanks.
+    if not text.isascii():
+        text = unicodedata.normalize("NFKC", text)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return _TRAILING_SPACE.sub("", text.replace("\x00", ""))
+
+
+def decode_text(buffer, encoding="utf-8-sig", block_size=TEXT_BLOCK_SIZE):
+    # Decode a block at a time so a memory-mapped file is never copied
+    # into a bytes object first; multi-byte characters split across blocks
+    # are carried over by the incremental decoder.
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    view = memoryview(buffer)
+    try:
+        parts = [decoder.decode(view[i:i + block_size]) for i in range(0, len(view), block_size)]
+    finally:
+        view.release()
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+# --------------------------------------------------
+# REPORT SOURCES
+# --------------------------------------------------
+class _Source:
+    # A report as handlers see it: its name, its path when it is a file on
+    # disk, and its bytes (a read-only mmap for files, the upload's own
+    # buffer otherwise).
+
+    def __init__(self, source):
+        self.path = None
+        self._file = None
+        self._map = None
+        if isinstance(source, (str, os.PathLike)):
+            self.path = self.name = os.fspath(source)
+            self._file = open(self.path, "rb")
+            if os.fstat(self._file.fileno()).st_size:
+                self.buffer = self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.buffer = b""
+        else:
+            self.name = getattr(source, "name", "") or ""
+            if hasattr(source, "getbuffer"):
+                self.buffer = source.getbuffer()
+            else:
+                self.buffer = _read_bytes(source)
+
+    @property
+    def extension(self):
+        return self.name.rsplit(".", 1)[-1].lower() if "." in self.name else ""
+
+    def open(self):
+        # A fresh file object for libraries that want one.
+        return self.path if self.path is not None else io.BytesIO(self.buffer)
+
+    def close(self):
+        if isinstance(self.buffer, memoryview):
+            self.buffer.release()
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def source_name(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "name", "") or ""
+
+
+# --------------------------------------------------
+# FORMAT HANDLERS
+# --------------------------------------------------
+# file type -> handler(source, workers, stop_early) returning a report dict
+_HANDLERS = {}
+_EXTENSIONS = {}
+# Magic bytes win over the extension, so a PDF saved as .txt is still a PDF.
+_MAGIC = []
+
+
+def register_handler(file_type, extensions=(), magic=()):
+    def decorator(handler):
+        _HANDLERS[file_type] = handler
+        for ext in extensions or (file_type,):
+            _EXTENSIONS[ext] = file_type
+        for prefix in magic:
+            _MAGIC.append((prefix, file_type))
+        return handler
+    return decorator
+
+
+def detect_type(name, head=b""):
+    head = bytes(head[:16])
+    for prefix, file_type in _MAGIC:
+        if head.startswith(prefix):
+            return file_type
+    ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    return _EXTENSIONS.get(ext)
+
+
+def supported_extensions():
+    return tuple(_EXTENSIONS)
+
+
+def _report(file_type, text, pages=1, record=None, numeric_data=None, timed_out=False):
+    return {
+        "file_type": file_type,
+        "text": normalize_text(text),
+        "pages": pages,
+        # CSV only: the first row, and its model features as floats
+        "record": record,
+        "numeric_data": numeric_data,
+        # OCR gave up on at least one page; the text is incomplete
+        "timed_out": timed_out,
+    }
+
+
+@register_handler("pdf", magic=(b"%PDF-",))
+def _pdf_report(source, workers=None, stop_early=False):
+    pdf = source.path if source.path is not None else bytes(source.buffer)
+    pages = list(iter_pdf_pages(pdf, workers=workers, stop_early=stop_early))
+    return _report("pdf", "\n".join(pages), len(pages))
+
+
+@register_handler(
+    "image",
+    extensions=("png", "jpg", "jpeg", "tif", "tiff"),
+    magic=(b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff", b"II*\x00", b"MM\x00*")
+)
+def _image_report(source, workers=None, stop_early=False):
+    from utils.ocr import ocr_file
+
+    result = ocr_file(source.open())
+    return _report("image", result["text"], len(result["pages"]), timed_out=result["timed_out"])
+
+
+@register_handler("txt")
+def _text_report(source, workers=None, stop_early=False):
+    return _report("txt", decode_text(source.buffer))
+
+
+CSV_TEXT_COLUMN = "doctor_prescription"
+# Same columns, same order as HealthRiskAnalyzer.features.
+CSV_FEATURES = ("age", "glucose", "cholesterol", "blood_pressure", "bmi")
+
+
+@register_handler("csv")
+def _csv_report(source, workers=None, stop_early=False):
+    import pandas as pd
+
+    # Only the first record is used; don't parse the rest of the file.
+    df = pd.read_csv(source.open(), nrows=1)
+    # Plain Python values, the same shape the cache hands back.
+    record = {k: v.item() if hasattr(v, "item") else v for k, v in df.iloc[0].items()} if len(df) else {}
+
+    numeric = {}
+    for f in CSV_FEATURES:
+        value = pd.to_numeric(pd.Series([record.get(f)]), errors="coerce").iloc[0]
+        if value == value:
+            numeric[f] = float(value)
+
+    text = record.get(CSV_TEXT_COLUMN)
+    if not isinstance(text, str):
+        # No prescription column: the row itself, one "column: value" line each.
+        text = "\n".join(f"{k}: {v}" for k, v in record.items())
+    return _report("csv", text, 1, record, numeric or None)
+
+
+# --------------------------------------------------
+# MAIN EXTRACTOR
+# --------------------------------------------------
+def extract_report(uploaded_file, workers=None, stop_early=False, cache=None):
+    # uploaded_file: an upload / file-like object with a name, or a path.
+    # Returns the normalized report dict built by the format's handler.
+    # cache=None uses the shared on-disk cache, cache=False bypasses it.
+    with _Source(uploaded_file) as source:
+        file_type = detect_type(source.name, source.buffer[:16])
+        if file_type is None:
+            raise ValueError(f"unsupported report format: {source.name or 'unnamed upload'}")
+        label = source.extension or file_type
+        metrics.count("bytes_processed", len(source.buffer), label)
+
+        if cache is None:
+            cache = get_default_cache()
+        if cache:
+            namespace = "report:stop_early" if stop_early else "report"
+            key = cache_key(source.buffer, file_type, namespace)
+            hit = cache.get(key)
+            if hit is not None:
+                metrics.count("extraction_cache_hits", 1, label)
+                return hit
 
-    elif file_type in ["png", "jpg", "jpeg"]:
-        image = Image.open(uploaded_file)
-        text = pytesseract.image_to_string(image)
+        with metrics.stage("extract_text", label):
+            report = _HANDLERS[file_type](source, workers, stop_early)
 
-    elif file_type == "txt":
-        text = uploaded_file.read().decode("utf-8")
+    # An incomplete report is not cached, so the next request retries it.
+    if cache and not report["timed_out"]:
+        cache.put(key, report)
+    return report
 
-    elif file_type == "csv":
-        df = pd.read_csv(uploaded_file)
-        text = df["doctor_prescription"].iloc[0]
-        numeric_data = df.iloc[0].to_dict()
 
-    return text, numeric_data
+def extract_text(uploaded_file, workers=None, stop_early=False, cache=None):
+    # (text, numeric_data): the CSV's first row as numeric_data, else None.
+    report = extract_report(uploaded_file, workers, stop_early, cache)
+    return report["text"], report["record"]
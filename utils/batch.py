@@ -0,0 +1,305 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils import metrics
+from utils.model_registry import preload, rss_bytes
+from utils.pipeline import (
+    SUPPORTED_EXTENSIONS, ReportFile, plan_to_dict, process_report, render_pdf, warm_up
+)
+
+DIET_TYPES = ("Veg", "Non-Veg")
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_MAX_BODY_BYTES = 64 * 1024 * 1024
+REQUEST_TIMEOUT = 120
+
+
+# --------------------------------------------------
+# JOB DISCOVERY
+# --------------------------------------------------
+def _supported(path):
+    return path.rsplit(".", 1)[-1].lower() in SUPPORTED_EXTENSIONS
+
+
+def iter_jobs(source, diet_type="Veg"):
+    # A directory of reports, a CSV manifest (path[,diet_type]) or a text
+    # manifest with one path per line. Manifest paths are relative to it.
+    if os.path.isdir(source):
+        for entry in sorted(os.listdir(source)):
+            path = os.path.join(source, entry)
+            if os.path.isfile(path) and _supported(entry):
+                yield path, diet_type
+        return
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, newline="", encoding="utf-8") as fh:
+        if source.lower().endswith(".csv"):
+            for row in csv.DictReader(fh):
+                yield os.path.join(base, row["path"]), row.get("diet_type") or diet_type
+        else:
+            for line in fh:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield os.path.join(base, line), diet_type
+
+
+# --------------------------------------------------
+# WORKERS
+# --------------------------------------------------
+def _worker_pool(workers):
+    # Warm up (model, catalog, libraries) in the parent, then fork: workers
+    # inherit it all copy-on-write instead of each loading their own copy.
+    warm_up()
+    # warm_up() already loaded the model; this only gc.freeze()s the heap.
+    preload([])
+    context = multiprocessing.get_context("fork") if sys.platform.startswith("linux") else None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+def output_names(paths):
+    # Report path relative to the jobs' common directory, flattened, so
+    # same-named reports from different directories don't overwrite each
+    # other. A plain directory of reports keeps bare file names.
+    if not paths:
+        return []
+    paths = [os.path.abspath(p) for p in paths]
+    base = os.path.commonpath([os.path.dirname(p) for p in paths])
+    return [os.path.relpath(p, base).replace(os.sep, "__") for p in paths]
+
+
+def process_path(path, diet_type, out_dir, write_pdf=True, output_name=None):
+    start = time.perf_counter()
+    stem = os.path.join(out_dir, (output_name or os.path.basename(path)) + ".plan")
+    try:
+        # Parallelism comes from the report pool; keep each report serial.
+        # A path, so extraction can memory-map the file instead of reading it.
+        result = process_report(path, diet_type, pdf_workers=1)
+        with open(stem + ".json", "w", encoding="utf-8") as fh:
+            json.dump(plan_to_dict(result), fh, indent=4)
+        if write_pdf:
+            with open(stem + ".pdf", "wb") as fh:
+                fh.write(render_pdf(result).getvalue())
+        error = None
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+
+    return {
+        "path": path,
+        "status": "ok" if error is None else "error",
+        "error": error,
+        "seconds": time.perf_counter() - start,
+        "pid": os.getpid(),
+        "rss_bytes": rss_bytes(),
+        # Empty unless metrics are enabled; the parent merges them.
+        "metrics": metrics.drain()
+    }
+
+
+def process_bytes(data, filename, diet_type="Veg", output_format="json"):
+    result = process_report(ReportFile(data, filename), diet_type, pdf_workers=1)
+    if output_format == "pdf":
+        body, content_type = render_pdf(result).getvalue(), "application/pdf"
+    else:
+        body, content_type = json.dumps(plan_to_dict(result)).encode("utf-8"), "application/json"
+    return body, content_type, metrics.drain()
+
+
+def run_batch(source, out_dir, diet_type="Veg", workers=DEFAULT_WORKERS, write_pdf=True,
+              stream=sys.stderr):
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = list(iter_jobs(source, diet_type))
+    names = output_names([path for path, _ in jobs])
+    results = []
+
+    with _worker_pool(workers) as pool:
+        started = time.perf_counter()
+        futures = [
+            pool.submit(process_path, path, dt, out_dir, write_pdf, name)
+            for (path, dt), name in zip(jobs, names)
+        ]
+        for future in as_completed(futures):
+            outcome = future.result()
+            metrics.merge(outcome.pop("metrics"))
+            results.append(outcome)
+            if stream is not None and outcome["error"]:
+                stream.write(f"{outcome['path']}: {outcome['error']}\n")
+
+    elapsed = time.perf_counter() - started
+    worker_rss = {}
+    for r in results:
+        worker_rss[r["pid"]] = max(worker_rss.get(r["pid"], 0), r["rss_bytes"])
+    summary = {
+        "reports": len(results),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "seconds": elapsed,
+        "reports_per_second": len(results) / elapsed if elapsed > 0 else 0.0,
+        "worker_rss_bytes": worker_rss
+    }
+    if stream is not None:
+        stream.write(
+            f"{summary['reports']} reports ({summary['failed']} failed) in "
+            f"{elapsed:.2f}s, {summary['reports_per_second']:.1f} reports/s\n"
+        )
+        if worker_rss:
+            stream.write(
+                f"worker RSS: max {max(worker_rss.values()) / 2**20:.1f} MiB "
+                f"across {len(worker_rss)} workers\n"
+            )
+    return summary, results
+
+
+# --------------------------------------------------
+# LOCAL HTTP ENDPOINT
+# --------------------------------------------------
+class PlanRequestHandler(BaseHTTPRequestHandler):
+    # POST /plan?filename=report.pdf&diet_type=Veg&format=json|pdf
+    # with the raw report bytes as the request body.
+
+    def _reply(self, status, body, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        if not self._body_read:
+            # The request body is still unread; don't reuse the connection.
+            self.close_connection = True
+        self._reply(status, json.dumps({"error": message}).encode("utf-8"))
+
+    def do_POST(self):
+        self._body_read = False
+        url = urlparse(self.path)
+        if url.path != "/plan":
+            self._error(404, "not found")
+            return
+
+        params = parse_qs(url.query)
+        filename = params.get("filename", ["report.txt"])[0]
+        diet_type = params.get("diet_type", ["Veg"])[0]
+        output_format = params.get("format", ["json"])[0]
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+
+        # Everything that can be rejected is rejected before the body is
+        # read, so refused requests never get buffered.
+        if length < 0:
+            self._error(400, "invalid Content-Length")
+            return
+        if length > self.server.max_body_bytes:
+            self._error(413, f"report larger than {self.server.max_body_bytes} bytes")
+            return
+        if not _supported(filename):
+            self._error(400, f"unsupported file type: {filename}")
+            return
+        if diet_type not in DIET_TYPES:
+            self._error(400, f"unsupported diet type: {diet_type}")
+            return
+
+        # Bounded queue: shed load instead of piling up work. The slot is
+        # held until the job itself finishes, not just until this request
+        # stops waiting for it, so at most workers + queue_size bodies are
+        # in memory at once.
+        slots = self.server.slots
+        if not slots.acquire(blocking=False):
+            self._error(503, "queue full")
+            return
+        try:
+            data = self.rfile.read(length)
+            self._body_read = True
+            future = self.server.pool.submit(process_bytes, data, filename, diet_type, output_format)
+        except Exception as exc:
+            slots.release()
+            self._error(500, f"{type(exc).__name__}: {exc}")
+            return
+        future.add_done_callback(lambda _: slots.release())
+
+        try:
+            body, content_type, state = future.result(timeout=self.server.request_timeout)
+        except FutureTimeoutError:
+            self._error(504, f"no result within {self.server.request_timeout}s")
+            return
+        except Exception as exc:
+            self._error(500, f"{type(exc).__name__}: {exc}")
+            return
+
+        metrics.merge(state)
+        if self.server.metrics_path:
+            metrics.autosave(path=self.server.metrics_path)
+        self._reply(200, body, content_type)
+
+    def log_message(self, format, *args):
+        sys.stderr.write("%s - %s\n" % (self.address_string(), format % args))
+
+
+def serve(host="127.0.0.1", port=8765, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+          request_timeout=REQUEST_TIMEOUT, metrics_path=None, max_body_bytes=DEFAULT_MAX_BODY_BYTES):
+    server = ThreadingHTTPServer((host, port), PlanRequestHandler)
+    server.pool = _worker_pool(workers)
+    server.slots = threading.BoundedSemaphore(workers + queue_size)
+    server.request_timeout = request_timeout
+    server.metrics_path = metrics_path
+    server.max_body_bytes = max_body_bytes
+
+    sys.stderr.write(f"Serving diet plans on http://{host}:{server.server_port}/plan\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.shutdown(cancel_futures=True)
+        if metrics_path:
+            metrics.export(metrics_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate diet plans without the Streamlit UI.")
+    parser.add_argument("source", nargs="?", help="Directory of reports or a manifest file")
+    parser.add_argument("--out", default="plans", help="Output directory for plan JSON/PDF")
+    parser.add_argument("--diet-type", default="Veg", choices=DIET_TYPES)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--no-pdf", action="store_true", help="Only write plan JSON")
+    parser.add_argument("--serve", action="store_true", help="Run the local HTTP endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument("--max-body-mb", type=float, default=DEFAULT_MAX_BODY_BYTES / 2**20,
+                        help="Reject larger uploads with 413")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Write per-stage timings (.json, else Prometheus text)")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        # Forked workers inherit the flag and hand their timings back with
+        # each result; only this process writes the file.
+        metrics.enable()
+
+    if args.serve:
+        serve(args.host, args.port, args.workers, args.queue_size, metrics_path=args.metrics,
+              max_body_bytes=int(args.max_body_mb * 2**20))
+        return
+    if not args.source:
+        parser.error("source is required unless --serve is given")
+
+    summary, _ = run_batch(args.source, args.out, args.diet_type, args.workers, not args.no_pdf)
+    if args.metrics:
+        metrics.export(args.metrics)
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
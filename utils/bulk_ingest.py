@@ -0,0 +1,171 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import metrics
+from utils.Diet_Generator import generate_diet
+from utils.Extraction import extract_medical_info_bulk
+from utils.planner import get_planner
+from utils.train_lightgbm import DEFAULT_MODEL_FILE, HealthRiskAnalyzer
+
+DEFAULT_CHUNKSIZE = 50000
+TEXT_COLUMN = "doctor_prescription"
+
+
+# --------------------------------------------------
+# PROGRESS / THROUGHPUT
+# --------------------------------------------------
+class ProgressCounter:
+    def __init__(self, stream=sys.stderr, interval=2.0):
+        self.stream = stream
+        self.interval = interval
+        self.rows = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def update(self, rows):
+        self.rows += rows
+        self.chunks += 1
+        now = time.perf_counter()
+        if self.stream is not None and now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self):
+        if self.stream is not None:
+            self.stream.write(
+                f"{self.rows} rows, {self.chunks} chunks, {self.rows_per_second:,.0f} rows/s\n"
+            )
+            self.stream.flush()
+
+
+# --------------------------------------------------
+# CHUNKED CSV INGESTION
+# --------------------------------------------------
+def _json_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def iter_csv_chunks(input_path, features, id_column=None, chunksize=DEFAULT_CHUNKSIZE):
+    dtypes = {f: "float32" for f in features}
+    dtypes[TEXT_COLUMN] = str
+    wanted = set(dtypes)
+    if id_column:
+        wanted.add(id_column)
+        dtypes[id_column] = str
+
+    # Only the columns the pipeline reads are parsed; everything else in a
+    # wide EHR export is skipped by the tokenizer.
+    return pd.read_csv(
+        input_path,
+        chunksize=chunksize,
+        usecols=lambda c: c in wanted,
+        dtype=dtypes
+    )
+
+
+def ingest_csv(input_path, output_path, model_file=DEFAULT_MODEL_FILE,
+               chunksize=DEFAULT_CHUNKSIZE, id_column=None, progress=None,
+               plan_diet_type=None, seed=0):
+    # plan_diet_type: also write a seeded weekly meal plan per row
+    # (seed + row number), planned a chunk at a time.
+    analyzer = HealthRiskAnalyzer(model_file)
+    progress = progress or ProgressCounter()
+    row_index = 0
+
+    # A model trained on other columns (like the bundled 7-feature pickle)
+    # can't score these rows; write them unscored instead of failing.
+    score = analyzer.accepts_features()
+    if not score:
+        sys.stderr.write(
+            f"warning: {model_file} was not trained on {', '.join(analyzer.features)}; "
+            f"writing rows without status/risk_probability\n"
+        )
+
+    with open(output_path, "w", encoding="utf-8") as out:
+        for chunk in iter_csv_chunks(input_path, analyzer.features, id_column, chunksize):
+            if TEXT_COLUMN in chunk.columns:
+                texts = chunk[TEXT_COLUMN].fillna("").tolist()
+            else:
+                texts = [""] * len(chunk)
+            ids = chunk[id_column].tolist() if id_column in chunk.columns else None
+
+            with metrics.stage("extract_medical_info_bulk", "csv"):
+                medical_info = extract_medical_info_bulk(texts)
+            if score:
+                labels, probabilities = analyzer.analyze_batch(chunk)
+            plans = None
+            if plan_diet_type:
+                with metrics.stage("plan_many", "csv"):
+                    seeds = range(seed + row_index, seed + row_index + len(texts))
+                    plans = get_planner().plan_many(texts, plan_diet_type, seeds)
+
+            lines = []
+            for i, text in enumerate(texts):
+                record = {
+                    "row": row_index + i,
+                    "status": labels[i] if score else None,
+                    "risk_probability": float(probabilities[i]) if score else None,
+                    "medical_info": {k: _json_value(v) for k, v in medical_info[i].items()},
+                    "diet": generate_diet(text)
+                }
+                if plans is not None:
+                    record["plan"] = plans[i]
+                if ids is not None:
+                    record[id_column] = _json_value(ids[i])
+                lines.append(json.dumps(record))
+
+            # One write per chunk; nothing from earlier chunks is retained.
+            out.write("\n".join(lines) + "\n")
+            out.flush()
+
+            row_index += len(chunk)
+            progress.update(len(chunk))
+            metrics.count("rows_processed", len(chunk), "csv")
+            metrics.autosave()
+
+    progress.report()
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score and generate diets for a patient CSV in bounded memory."
+    )
+    parser.add_argument("input", help="CSV export with feature columns and doctor_prescription")
+    parser.add_argument("output", help="JSON Lines file to write, one record per row")
+    parser.add_argument("--model", default=DEFAULT_MODEL_FILE)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--id-column", default=None)
+    parser.add_argument("--plan", choices=["Veg", "Non-Veg"], default=None,
+                        help="Add a weekly meal plan of this diet type to each row")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed for --plan")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Write per-stage timings (.json, else Prometheus text)")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        metrics.enable()
+    ingest_csv(args.input, args.output, model_file=args.model,
+               chunksize=args.chunksize, id_column=args.id_column,
+               plan_diet_type=args.plan, seed=args.seed)
+    if args.metrics:
+        metrics.export(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Bump whenever extractor output changes so stale entries stop matching.
+EXTRACTOR_VERSION = "5"
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "DIET_EXTRACTION_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "ai_dietplanner", "extraction.sqlite")
+)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MEMORY_ENTRIES = 64
+EVICT_BATCH = 32
+
+
+def cache_key(data, file_type, namespace="", version=EXTRACTOR_VERSION):
+    digest = hashlib.sha256()
+    digest.update(f"{namespace}\0{version}\0{file_type}\0".encode("utf-8"))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _json_default(value):
+    # numpy scalars coming out of pandas rows
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+# --------------------------------------------------
+# TWO-TIER LRU CACHE (MEMORY + SQLITE)
+# --------------------------------------------------
+class ExtractionCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+            # Running total of entry sizes, kept by triggers so every
+            # process sharing the file sees it and a put doesn't have to
+            # SUM the whole table.
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stats ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO stats (id, total) "
+                "SELECT 0, COALESCE(SUM(size), 0) FROM entries"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_added AFTER INSERT ON entries "
+                "BEGIN UPDATE stats SET total = total + NEW.size WHERE id = 0; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_removed AFTER DELETE ON entries "
+                "BEGIN UPDATE stats SET total = total - OLD.size WHERE id = 0; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_resized AFTER UPDATE OF size ON entries "
+                "BEGIN UPDATE stats SET total = total + NEW.size - OLD.size WHERE id = 0; END"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        # Callers get their own copy; mutating a result must not change
+        # what later hits return.
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return copy.deepcopy(self._memory[key])
+
+            if not self.path:
+                return None
+
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+
+            value = json.loads(row[0])
+            self._remember(key, value)
+            return copy.deepcopy(value)
+
+    def put(self, key, value):
+        payload = json.dumps(value, default=_json_default)
+        # Round-trip so memory hits return the same shape as disk hits.
+        value = json.loads(payload)
+
+        with self._lock:
+            self._remember(key, value)
+            if not self.path:
+                return
+
+            conn = self._connect()
+            # An upsert, not INSERT OR REPLACE: REPLACE's implicit delete
+            # doesn't fire the size triggers.
+            conn.execute(
+                "INSERT INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "last_access = excluded.last_access",
+                (key, payload, len(payload), time.time())
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT total FROM stats WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Oldest first, a few at a time: usually one put only pushes the
+        # total a little over the limit.
+        while total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.path:
+                conn = self._connect()
+                conn.execute("DELETE FROM entries")
+                conn.commit()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ExtractionCache()
+        return _default_cache
@@ -0,0 +1,155 @@
+import json
+import os
+import re
+import sys
+import threading
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "meal_catalog.json")
+
+
+# --------------------------------------------------
+# IMMUTABLE MEAL CATALOG
+# --------------------------------------------------
+class MealCatalog:
+    def __init__(self, data):
+        self.diet_types = tuple(data["diet_types"])
+        self.slots = tuple(data["slots"])
+        self.conditions = tuple(data["conditions"])
+        self.default_condition = data["default_condition"]
+
+        self._avoid = {
+            name: tuple(spec.get("avoid", ()))
+            for name, spec in data["conditions"].items()
+        }
+        # restricted food (as in Diet_Generator's restricted_foods) -> meal
+        # name fragments that contain it
+        self._restrictions = {
+            term.lower(): tuple(k.lower() for k in keywords)
+            for term, keywords in data.get("restrictions", {}).items()
+        }
+
+        # (diet_type, condition, slot) -> meals, in catalog order
+        self._meals = {}
+        # (diet_type, slot) -> every distinct meal for that slot; condition
+        # pools are stored as bitsets over this tuple so several conditions
+        # intersect with a single AND.
+        self._pools = {}
+        self._masks = {}
+
+        for diet_type in self.diet_types:
+            for slot in self.slots:
+                index = {}
+                for condition in self.conditions:
+                    meals = data["meals"][diet_type].get(condition, {}).get(slot, ())
+                    meals = tuple(sys.intern(m) for m in meals)
+                    self._meals[(diet_type, condition, slot)] = meals
+
+                    mask = 0
+                    for meal in meals:
+                        bit = index.setdefault(meal, len(index))
+                        mask |= 1 << bit
+                    self._masks[(diet_type, condition, slot)] = mask
+                self._pools[(diet_type, slot)] = tuple(index)
+
+        keywords = {}
+        for name, spec in data["conditions"].items():
+            for keyword in spec.get("keywords", ()):
+                keywords[keyword.lower()] = name
+        self._keyword_conditions = keywords
+        self._keyword_pattern = (
+            re.compile("|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)))
+            if keywords else None
+        )
+
+    def meals(self, diet_type, condition, slot):
+        return self._meals[(diet_type, condition, slot)]
+
+    def match_conditions(self, text):
+        # Single pass over the text; stops once every condition has been seen.
+        found = set()
+        if self._keyword_pattern is not None:
+            wanted = set(self._keyword_conditions.values())
+            for m in self._keyword_pattern.finditer(text.lower()):
+                found.add(self._keyword_conditions[m.group()])
+                if found == wanted:
+                    break
+
+        if not found:
+            return (self.default_condition,)
+        return tuple(c for c in self.conditions if c in found)
+
+    def avoid(self, conditions):
+        seen = {}
+        for condition in conditions:
+            for item in self._avoid.get(condition, ()):
+                seen.setdefault(item, None)
+        return list(seen)
+
+    def restricted(self, meals, restrictions):
+        # Drop meals containing any restricted food. Terms missing from the
+        # catalog are matched literally.
+        fragments = []
+        for term in restrictions:
+            term = term.lower()
+            fragments.extend(self._restrictions.get(term, (term,)))
+        if not fragments:
+            return tuple(meals)
+        return tuple(m for m in meals if not any(f in m.lower() for f in fragments))
+
+    def meal_pool(self, diet_type, conditions, slot, minimum=0, restrictions=()):
+        # Restrictions are applied before topping up, so the top-up replaces
+        # restricted meals too.
+        primary = self.restricted(self._meals[(diet_type, conditions[0], slot)], restrictions)
+        if len(conditions) == 1:
+            return primary
+
+        mask = -1
+        for condition in conditions:
+            mask &= self._masks[(diet_type, condition, slot)]
+
+        pool = self._pools[(diet_type, slot)]
+        meals = list(self.restricted([pool[i] for i in range(len(pool)) if mask >> i & 1], restrictions))
+
+        # Too few meals suit every condition: top up from the primary one,
+        # then from the other conditions in order.
+        if len(meals) < minimum:
+            chosen = set(meals)
+            candidates = [primary] + [
+                self.restricted(self._meals[(diet_type, c, slot)], restrictions) for c in conditions[1:]
+            ]
+            for meal in (m for group in candidates for m in group):
+                if len(meals) >= minimum:
+                    break
+                if meal not in chosen:
+                    meals.append(meal)
+                    chosen.add(meal)
+
+        return tuple(meals)
+
+
+# --------------------------------------------------
+# LAZY LOADING
+# --------------------------------------------------
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def load_catalog(path=DEFAULT_CATALOG_PATH):
+    with open(path, encoding="utf-8") as fh:
+        return MealCatalog(json.load(fh))
+
+
+def get_catalog():
+    # Parsed on first use, not at import time.
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_catalog(os.environ.get("DIET_MEAL_CATALOG", DEFAULT_CATALOG_PATH))
+    return _catalog
+
+
+def set_catalog(catalog):
+    global _catalog
+    with _catalog_lock:
+        _catalog = catalog
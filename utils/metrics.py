@@ -0,0 +1,240 @@
+import atexit
+import bisect
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Off unless DIET_METRICS is set (or enable() is called). When off, stage()
+# returns a shared no-op context manager, so instrumented code costs one
+# global lookup and a function call per stage.
+_enabled = os.environ.get("DIET_METRICS", "") not in ("", "0", "false")
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+AUTOSAVE_INTERVAL = 10.0
+
+_lock = threading.Lock()
+_histograms = {}  # (stage, file_type) -> [bucket counts..., +Inf count, sum]
+_counters = {}  # (name, file_type) -> value
+_last_autosave = 0.0
+_autosave_lock = threading.Lock()
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+# --------------------------------------------------
+# RECORDING
+# --------------------------------------------------
+def observe(stage_name, seconds, file_type=""):
+    key = (stage_name, file_type or "")
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        hist[bisect.bisect_left(BUCKETS, seconds)] += 1
+        hist[-1] += seconds
+
+
+def count(name, value=1, file_type=""):
+    if not _enabled:
+        return
+    key = (name, file_type or "")
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "file_type", "start")
+
+    def __init__(self, name, file_type):
+        self.name = name
+        self.file_type = file_type
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, self.file_type)
+        return False
+
+
+def stage(name, file_type=""):
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name, file_type)
+
+
+# --------------------------------------------------
+# MERGING ACROSS PROCESSES
+# --------------------------------------------------
+def drain():
+    # Hand the recorded state to a parent process and start over.
+    with _lock:
+        state = {
+            "histograms": [[k[0], k[1], v] for k, v in _histograms.items()],
+            "counters": [[k[0], k[1], v] for k, v in _counters.items()],
+        }
+        _histograms.clear()
+        _counters.clear()
+    return state
+
+
+def merge(state):
+    with _lock:
+        for name, file_type, values in state.get("histograms", ()):
+            hist = _histograms.setdefault((name, file_type), [0] * (len(BUCKETS) + 1) + [0.0])
+            for i, v in enumerate(values):
+                hist[i] += v
+        for name, file_type, value in state.get("counters", ()):
+            _counters[(name, file_type)] = _counters.get((name, file_type), 0) + value
+
+
+# --------------------------------------------------
+# EXPORT
+# --------------------------------------------------
+def snapshot():
+    with _lock:
+        stages = []
+        for (name, file_type), hist in sorted(_histograms.items()):
+            counts = hist[:-1]
+            stages.append({
+                "stage": name,
+                "file_type": file_type,
+                "count": sum(counts),
+                "sum_seconds": hist[-1],
+                "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], counts)),
+            })
+        counters = [
+            {"name": name, "file_type": file_type, "value": value}
+            for (name, file_type), value in sorted(_counters.items())
+        ]
+    return {"stages": stages, "counters": counters}
+
+
+def _labels(**labels):
+    inner = ",".join(f'{k}="{v}"' for k, v in labels.items() if v != "")
+    return "{" + inner + "}" if inner else ""
+
+
+def prometheus_text():
+    lines = [
+        "# HELP diet_stage_seconds Time spent in each report pipeline stage.",
+        "# TYPE diet_stage_seconds histogram",
+    ]
+    with _lock:
+        for (name, file_type), hist in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, n in zip([str(b) for b in BUCKETS] + ["+Inf"], hist[:-1]):
+                cumulative += n
+                lines.append(
+                    f"diet_stage_seconds_bucket{_labels(stage=name, file_type=file_type, le=bound)} {cumulative}"
+                )
+            lines.append(f"diet_stage_seconds_sum{_labels(stage=name, file_type=file_type)} {hist[-1]}")
+            lines.append(f"diet_stage_seconds_count{_labels(stage=name, file_type=file_type)} {cumulative}")
+
+        names = sorted({name for name, _ in _counters})
+        for metric in names:
+            lines.append(f"# TYPE diet_{metric}_total counter")
+            for (name, file_type), value in sorted(_counters.items()):
+                if name == metric:
+                    lines.append(f"diet_{name}_total{_labels(file_type=file_type)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def export(path):
+    # .json gets the snapshot, anything else the Prometheus text format.
+    if path.endswith(".json"):
+        payload = json.dumps(snapshot(), indent=2)
+    else:
+        payload = prometheus_text()
+    # Per thread: concurrent exports each replace the file whole.
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(payload)
+    os.replace(tmp, path)
+    return path
+
+
+def autosave(force=False, path=None):
+    # Writes to path (default DIET_METRICS_FILE) at most every
+    # AUTOSAVE_INTERVAL seconds.
+    global _last_autosave
+    path = path or os.environ.get("DIET_METRICS_FILE")
+    if not _enabled or not path:
+        return None
+    with _autosave_lock:
+        now = time.monotonic()
+        if not force and now - _last_autosave < AUTOSAVE_INTERVAL:
+            return None
+        _last_autosave = now
+        return export(path)
+
+
+atexit.register(lambda: autosave(force=True))
+
+
+# --------------------------------------------------
+# OPT-IN PROFILING OF A SINGLE REQUEST
+# --------------------------------------------------
+@contextmanager
+def profile(path_prefix, cpu=True, memory=True, top=25):
+    # Writes <prefix>.prof (cProfile, open with pstats/snakeviz) and
+    # <prefix>.mem.txt (tracemalloc top allocations and peak).
+    directory = os.path.dirname(path_prefix)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    profiler = cProfile.Profile() if cpu else None
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(path_prefix + ".prof")
+        if memory and tracemalloc.is_tracing():
+            snapshot_ = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            with open(path_prefix + ".mem.txt", "w", encoding="utf-8") as fh:
+                fh.write(f"current={current} peak={peak}\n")
+                for stat in snapshot_.statistics("lineno")[:top]:
+                    fh.write(f"{stat}\n")
+            if started_tracing:
+                tracemalloc.stop()
@@ -0,0 +1,134 @@
+import gc
+import os
+import sys
+import threading
+import time
+
+import joblib
+
+# Native LightGBM text models load without unpickling the sklearn wrapper.
+NATIVE_EXTENSIONS = (".txt", ".lgb", ".model")
+
+_models = {}
+_lock = threading.Lock()
+
+
+# --------------------------------------------------
+# PROCESS MEMORY
+# --------------------------------------------------
+def peak_rss_bytes():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_bytes()
+
+
+# --------------------------------------------------
+# REGISTRY
+# --------------------------------------------------
+def _signature(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_model_file(path):
+    if path.lower().endswith(NATIVE_EXTENSIONS):
+        import lightgbm as lgb
+        return lgb.Booster(model_file=path)
+    return joblib.load(path)
+
+
+def get_model(path):
+    # One copy per (file, mtime, size); a changed artifact is reloaded on
+    # the next call. Models loaded before a fork are shared copy-on-write.
+    real = os.path.realpath(path)
+    signature = _signature(real)
+    entry = _models.get(real)
+    if entry is not None and entry["signature"] == signature:
+        return entry["model"]
+
+    with _lock:
+        entry = _models.get(real)
+        if entry is not None and entry["signature"] == signature:
+            return entry["model"]
+
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        model = load_model_file(real)
+        _models[real] = {
+            "model": model,
+            "signature": signature,
+            "load_seconds": time.perf_counter() - start,
+            "rss_delta_bytes": rss_bytes() - rss_before,
+            "loaded_by_pid": os.getpid(),
+        }
+        return model
+
+
+def preload(paths, freeze=True):
+    # Load in the parent before creating a fork-based worker pool so every
+    # worker starts with the model already in (shared) memory. gc.freeze()
+    # keeps the collector from touching, and so copying, those pages.
+    for path in paths:
+        get_model(path)
+    if freeze and hasattr(gc, "freeze"):
+        gc.collect()
+        gc.freeze()
+    return model_stats()
+
+
+def model_stats():
+    return {
+        path: {
+            "mtime_ns": entry["signature"][0],
+            "size": entry["signature"][1],
+            "load_seconds": entry["load_seconds"],
+            "rss_delta_bytes": entry["rss_delta_bytes"],
+            "loaded_by_pid": entry["loaded_by_pid"],
+            "shared": entry["loaded_by_pid"] != os.getpid(),
+        }
+        for path, entry in _models.items()
+    }
+
+
+def clear():
+    with _lock:
+        _models.clear()
+
+
+def export_native_model(model_file, out_path):
+    # Write the booster of a pickled LGBMClassifier as a LightGBM text model.
+    model = get_model(model_file)
+    booster = getattr(model, "booster_", model)
+    booster.save_model(out_path)
+    return out_path
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load a model and report load time and RSS.")
+    parser.add_argument("model")
+    parser.add_argument("--export-native", metavar="PATH")
+    args = parser.parse_args(argv)
+
+    base = rss_bytes()
+    get_model(args.model)
+    for path, stats in model_stats().items():
+        print(f"{path}: loaded in {stats['load_seconds'] * 1000:.1f} ms, "
+              f"+{stats['rss_delta_bytes'] / 2**20:.1f} MiB RSS "
+              f"(process {rss_bytes() / 2**20:.1f} MiB, {base / 2**20:.1f} MiB before)")
+    if args.export_native:
+        print(f"wrote {export_native_model(args.model, args.export_native)}")
+
+
+if __name__ == "__main__":
+    main()
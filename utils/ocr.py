@@ -0,0 +1,160 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytesseract
+from PIL import Image, ImageOps, ImageSequence
+
+from utils import metrics
+
+# Tesseract is tuned for ~300 DPI; phone photos are far larger than that.
+TARGET_DPI = 300
+MAX_SIDE = 2480  # A4 width at 300 DPI
+CROP_MARGIN = 12
+OCR_TIMEOUT = 30
+DEFAULT_OCR_WORKERS = min(4, os.cpu_count() or 1)
+
+
+# --------------------------------------------------
+# PREPROCESSING
+# --------------------------------------------------
+def _otsu_threshold(histogram):
+    total = sum(histogram)
+    sum_all = sum(i * h for i, h in enumerate(histogram))
+    weight_bg = 0
+    sum_bg = 0
+    best = 0.0
+    threshold = 127
+
+    for i, h in enumerate(histogram):
+        weight_bg += h
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += i * h
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if between > best:
+            best = between
+            threshold = i
+
+    return threshold
+
+
+def _scale_for(image, target_dpi, max_side):
+    scale = 1.0
+    dpi = image.info.get("dpi")
+    if dpi and dpi[0] and dpi[0] > target_dpi:
+        scale = target_dpi / float(dpi[0])
+    longest = max(image.size)
+    if longest * scale > max_side:
+        scale = max_side / float(longest)
+    return scale
+
+
+def preprocess(image, target_dpi=TARGET_DPI, max_side=MAX_SIDE, crop=True):
+    timings = {}
+
+    start = time.perf_counter()
+    scale = _scale_for(image, target_dpi, max_side)
+    target_side = max(1, round(max(image.size) * scale))
+    if scale < 1.0:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        # For JPEGs this decodes straight at a reduced scale.
+        image.draft("L", size)
+    image = ImageOps.exif_transpose(image)
+    # draft() keeps the original DPI in image.info, so only the remaining
+    # factor to the target size is applied here, not the DPI ratio again.
+    scale = target_side / max(image.size)
+    if scale < 1.0:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+    timings["downscale"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gray = image.convert("L")
+    timings["grayscale"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    threshold = _otsu_threshold(gray.histogram())
+    binary = gray.point([0 if v <= threshold else 255 for v in range(256)])
+    timings["binarize"] = time.perf_counter() - start
+
+    if crop:
+        start = time.perf_counter()
+        # Bounding box of the dark (text) pixels, plus a small margin.
+        bbox = ImageOps.invert(binary).getbbox()
+        if bbox:
+            left, top, right, bottom = bbox
+            binary = binary.crop((
+                max(0, left - CROP_MARGIN),
+                max(0, top - CROP_MARGIN),
+                min(binary.width, right + CROP_MARGIN),
+                min(binary.height, bottom + CROP_MARGIN)
+            ))
+        timings["crop"] = time.perf_counter() - start
+
+    return binary, timings
+
+
+# --------------------------------------------------
+# RECOGNITION
+# --------------------------------------------------
+def ocr_image(image, timeout=OCR_TIMEOUT, crop=True, lang="eng"):
+    processed, timings = preprocess(image, crop=crop)
+
+    start = time.perf_counter()
+    timed_out = False
+    try:
+        text = pytesseract.image_to_string(processed, lang=lang, timeout=timeout)
+    except RuntimeError as exc:
+        # pytesseract kills the subprocess and raises on timeout
+        if "timeout" not in str(exc).lower():
+            raise
+        text = ""
+        timed_out = True
+    timings["tesseract"] = time.perf_counter() - start
+
+    return {"text": text, "timings": timings, "timed_out": timed_out}
+
+
+def ocr_images(images, workers=DEFAULT_OCR_WORKERS, timeout=OCR_TIMEOUT, crop=True):
+    images = list(images)
+    if len(images) <= 1 or workers <= 1:
+        return [ocr_image(img, timeout=timeout, crop=crop) for img in images]
+
+    # Tesseract runs as a subprocess, so threads are enough to use all cores.
+    with ThreadPoolExecutor(max_workers=min(workers, len(images))) as pool:
+        return list(pool.map(lambda img: ocr_image(img, timeout=timeout, crop=crop), images))
+
+
+def ocr_file(uploaded_file, workers=DEFAULT_OCR_WORKERS, timeout=OCR_TIMEOUT, crop=True):
+    start = time.perf_counter()
+    image = Image.open(uploaded_file)
+    # Multi-page scans (e.g. TIFF) come in as frames of one image.
+    n_frames = getattr(image, "n_frames", 1)
+    if n_frames > 1:
+        frames = [frame.copy() for frame in ImageSequence.Iterator(image)]
+    else:
+        frames = [image]
+    load_time = time.perf_counter() - start
+
+    pages = ocr_images(frames, workers=workers, timeout=timeout, crop=crop)
+    metrics.count("pages_processed", len(pages), "image")
+
+    timings = {"load": load_time}
+    for page in pages:
+        for stage, seconds in page["timings"].items():
+            timings[stage] = timings.get(stage, 0.0) + seconds
+            if metrics.enabled():
+                metrics.observe(f"ocr_{stage}", seconds, "image")
+
+    return {
+        "text": "\n".join(page["text"] for page in pages),
+        "pages": pages,
+        "timings": timings,
+        "timed_out": any(page["timed_out"] for page in pages)
+    }
@@ -0,0 +1,124 @@
+import copy
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+TITLE = "<b>AI Diet Planner – 7 Day Diet Plan</b>"
+SLOTS = ("Breakfast", "Lunch", "Snacks", "Dinner")
+
+
+# --------------------------------------------------
+# RENDERER
+# --------------------------------------------------
+class DietPdfRenderer:
+    # Builds the stylesheet and the static flowables once. A plan is a dict
+    # with name, age, condition, diet_type, avoid, lifestyle and days, where
+    # days is a list of {"Day", "Breakfast", "Lunch", "Snacks", "Dinner"}.
+
+    def __init__(self, pagesize=A4):
+        self.pagesize = pagesize
+        styles = getSampleStyleSheet()
+        self.normal = styles["Normal"]
+        self.heading = styles["Heading2"]
+
+        self._title = Paragraph(TITLE, styles["Title"])
+        self._spacer = Paragraph("<br/>", self.normal)
+        self._avoid_heading = Paragraph("<b>Foods to Avoid</b>", self.heading)
+        self._lifestyle_heading = Paragraph("<br/><b>Lifestyle Recommendations</b>", self.heading)
+        self._lifestyle = {}
+
+    @staticmethod
+    def _static(flowable):
+        # Markup is parsed once; each story gets its own copy for layout state.
+        return copy.copy(flowable)
+
+    def _lifestyle_items(self, lifestyle):
+        key = tuple(lifestyle)
+        items = self._lifestyle.get(key)
+        if items is None:
+            items = tuple(Paragraph(f"• {l}", self.normal) for l in key)
+            self._lifestyle[key] = items
+        return [self._static(p) for p in items]
+
+    def story(self, plan):
+        normal = self.normal
+        elements = [
+            self._static(self._title),
+            self._static(self._spacer),
+            Paragraph(
+                f"Name: {plan['name']}<br/>"
+                f"Age: {plan['age']}<br/>"
+                f"Condition: {plan['condition']}<br/>"
+                f"Diet Type: {plan['diet_type']}",
+                normal
+            ),
+            self._static(self._spacer),
+        ]
+
+        for day in plan["days"]:
+            elements.append(Paragraph(
+                f"<b>{day['Day']}</b><br/>"
+                + "".join(f"{slot}: {day[slot]}<br/>" for slot in SLOTS)
+                + "<br/>",
+                normal
+            ))
+
+        elements.append(self._static(self._avoid_heading))
+        elements.append(Paragraph(", ".join(plan["avoid"]), normal))
+        elements.append(self._static(self._lifestyle_heading))
+        elements.extend(self._lifestyle_items(plan["lifestyle"]))
+        return elements
+
+    def render(self, plan, output=None):
+        output = io.BytesIO() if output is None else output
+        SimpleDocTemplate(output, pagesize=self.pagesize).build(self.story(plan))
+        if hasattr(output, "seek"):
+            output.seek(0)
+        return output
+
+    def render_many(self, plans, output=None):
+        # Several patients in one document, each starting on a new page.
+        output = io.BytesIO() if output is None else output
+        elements = []
+        for plan in plans:
+            if elements:
+                elements.append(PageBreak())
+            elements.extend(self.story(plan))
+        SimpleDocTemplate(output, pagesize=self.pagesize).build(elements)
+        if hasattr(output, "seek"):
+            output.seek(0)
+        return output
+
+
+_renderer = None
+
+
+def get_renderer():
+    global _renderer
+    if _renderer is None:
+        _renderer = DietPdfRenderer()
+    return _renderer
+
+
+# --------------------------------------------------
+# PARALLEL FILE OUTPUT
+# --------------------------------------------------
+def _render_to_path(job):
+    plan, path = job
+    get_renderer().render(plan, path)
+    return path
+
+
+def render_files(plans, paths, workers=None):
+    jobs = list(zip(plans, paths))
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) <= 1:
+        return [_render_to_path(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        return list(pool.map(_render_to_path, jobs, chunksize=chunksize))
@@ -0,0 +1,222 @@
+# Report pipeline shared by the Streamlit app and headless workers. Nothing
+# here touches streamlit, so it can be imported from any process.
+
+import os
+import re
+import io
+import time
+
+from utils import metrics
+from utils.Extraction import extract_report, source_name, supported_extensions
+from utils.meal_catalog import get_catalog
+
+# pandas, the OCR stack and reportlab are imported where they are used so
+# that starting the app or a worker only loads what its requests need.
+
+# Whatever Extraction has a format handler for.
+SUPPORTED_EXTENSIONS = supported_extensions()
+
+# -------------------- REPORT FILES --------------------
+class ReportFile(io.BytesIO):
+    # In-memory stand-in for Streamlit's UploadedFile.
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+# -------------------- PATIENT INFO --------------------
+NAME_PATTERN = re.compile(r"name[:\-]?\s*([A-Za-z ]+)")
+AGE_PATTERN = re.compile(r"age[:\-]?\s*(\d+)")
+
+def extract_patient_info(text):
+    name = NAME_PATTERN.search(text)
+    age = AGE_PATTERN.search(text)
+    return (
+        name.group(1).strip() if name else "Not Found",
+        age.group(1) if age else "Not Found"
+    )
+
+NAME_COLUMNS = ("name", "patient_name")
+AGE_COLUMNS = ("age",)
+
+def record_patient_info(record, name, age):
+    # Structured (CSV) reports carry name/age as columns; prefer those.
+    for column in NAME_COLUMNS:
+        if isinstance(record.get(column), str) and record[column].strip():
+            name = record[column].strip()
+            break
+    for column in AGE_COLUMNS:
+        value = record.get(column)
+        if isinstance(value, (int, float)) and value == value:
+            age = str(int(value))
+            break
+    return name, age
+
+# -------------------- RISK SCORING --------------------
+def score_numeric(numeric_data):
+    # CSV lab values go to the model as they are, not through the text.
+    # None when there is nothing to score or the model expects other columns.
+    analyzer = get_analyzer()
+    if not numeric_data or analyzer is None or not analyzer.accepts_features():
+        return None
+    return analyzer.analyze(numeric_data)
+
+# -------------------- DIET GENERATION --------------------
+LIFESTYLE = (
+    "Exercise at least 30 minutes daily",
+    "Drink 2–3 liters of water",
+    "Sleep 7–8 hours daily",
+    "Limit processed and high-fat foods"
+)
+
+def generate_diet(text, diet_type="Veg", seed=None):
+    import pandas as pd
+    from utils.planner import get_planner
+
+    catalog = get_catalog()
+
+    # -------------------- Determine Condition(s) --------------------
+    conditions = catalog.match_conditions(text)
+    condition = " + ".join(conditions)
+    avoid = catalog.avoid(conditions)
+
+    # -------------------- Lifestyle Advice --------------------
+    lifestyle = list(LIFESTYLE)
+
+    # -------------------- Generate 7-day plan --------------------
+    # Distinct meals per slot through the week (cycling only when a pool
+    # is shorter than 7), minus anything Diet_Generator restricts.
+    diet_key = "Veg" if diet_type == "Veg" else "Non-Veg"
+    planner = get_planner()
+    restrictions = planner.requirements(text)[1]
+    plan = planner.plan(diet_key, conditions, seed, restrictions)
+
+    df = pd.DataFrame({"Day": plan["Day"], **{slot: plan[slot] for slot in catalog.slots}})
+
+    return condition, avoid, lifestyle, df
+
+# -------------------- PDF GENERATOR --------------------
+def plan_record(name, age, condition, diet_type, avoid, lifestyle, diet_df):
+    return {
+        "name": name,
+        "age": age,
+        "condition": condition,
+        "diet_type": diet_type,
+        "avoid": list(avoid),
+        "lifestyle": list(lifestyle),
+        "days": diet_df.to_dict("records")
+    }
+
+# -------------------- FULL PIPELINE --------------------
+def process_report(uploaded_file, diet_type="Veg", pdf_workers=None, profile_to=None,
+                   seed=None, progress=None):
+    # uploaded_file: an upload / ReportFile, or a path (memory-mapped).
+    # profile_to: path prefix for an opt-in cProfile/tracemalloc capture of
+    # this one request (also enabled for every request by DIET_PROFILE_DIR).
+    # progress: optional callback(stage_label, fraction) for UIs.
+    profile_dir = os.environ.get("DIET_PROFILE_DIR")
+    if profile_to is None and profile_dir:
+        profile_to = os.path.join(profile_dir, f"report-{os.getpid()}-{time.time_ns()}")
+    if profile_to:
+        with metrics.profile(profile_to):
+            return _process_report(uploaded_file, diet_type, pdf_workers, seed, progress)
+    return _process_report(uploaded_file, diet_type, pdf_workers, seed, progress)
+
+def _process_report(uploaded_file, diet_type, pdf_workers, seed=None, progress=None):
+    ext = source_name(uploaded_file).rsplit(".", 1)[-1].lower()
+    notify = progress or (lambda stage, fraction: None)
+    with metrics.stage("report_total", ext):
+        notify("Reading report", 0.05)
+        report = extract_report(uploaded_file, workers=pdf_workers)
+        text = report["text"].lower()
+        notify("Extracting patient details", 0.7)
+        with metrics.stage("extract_patient_info"):
+            name, age = extract_patient_info(text)
+            if report["record"]:
+                name, age = record_patient_info(report["record"], name, age)
+        risk_status = score_numeric(report["numeric_data"])
+        notify("Generating diet plan", 0.8)
+        with metrics.stage("generate_diet"):
+            condition, avoid, lifestyle, diet_df = generate_diet(text, diet_type, seed)
+    metrics.count("reports_processed", 1, ext)
+    metrics.autosave()
+    notify("Done", 1.0)
+    return {
+        "name": name,
+        "age": age,
+        "condition": condition,
+        "risk_status": risk_status,
+        # OCR timed out on part of the report: the plan may be generic
+        "timed_out": report["timed_out"],
+        "diet_type": diet_type,
+        "avoid": avoid,
+        "lifestyle": lifestyle,
+        "diet_df": diet_df
+    }
+
+def plan_to_dict(result):
+    plan = {k: v for k, v in result.items() if k != "diet_df"}
+    plan["plan"] = result["diet_df"].to_dict("records")
+    return plan
+
+def result_plan(result):
+    return plan_record(
+        result["name"], result["age"], result["condition"], result["diet_type"],
+        result["avoid"], result["lifestyle"], result["diet_df"]
+    )
+
+def render_pdf(result):
+    from utils.pdf_renderer import get_renderer
+    with metrics.stage("generate_diet_pdf"):
+        return get_renderer().render(result_plan(result))
+
+# -------------------- WARM-UP --------------------
+_analyzer = None
+
+def get_analyzer():
+    # The analyzer warm_up() loaded, else one for the default model if it
+    # exists (loaded on first use).
+    global _analyzer
+    if _analyzer is None:
+        from utils.train_lightgbm import DEFAULT_MODEL_FILE, HealthRiskAnalyzer
+        if os.path.exists(DEFAULT_MODEL_FILE):
+            _analyzer = HealthRiskAnalyzer(DEFAULT_MODEL_FILE)
+    return _analyzer
+
+def warm_up(model_file=None, formats=SUPPORTED_EXTENSIONS, pdf_output=True):
+    # Call once before serving traffic: loads the model, the meal catalog
+    # and the libraries behind the given input formats / PDF output.
+    global _analyzer
+    timings = {}
+
+    def timed(stage, fn):
+        start = time.perf_counter()
+        fn()
+        timings[stage] = time.perf_counter() - start
+
+    timed("pandas", lambda: __import__("pandas"))
+    timed("catalog", get_catalog)
+
+    if model_file is None:
+        from utils.train_lightgbm import DEFAULT_MODEL_FILE
+        model_file = DEFAULT_MODEL_FILE
+    if model_file and os.path.exists(model_file):
+        def load_model():
+            global _analyzer
+            from utils.train_lightgbm import HealthRiskAnalyzer
+            analyzer = HealthRiskAnalyzer(model_file)
+            analyzer._load()
+            _analyzer = analyzer
+        timed("model", load_model)
+
+    formats = set(formats)
+    if "pdf" in formats:
+        timed("pdfplumber", lambda: __import__("pdfplumber"))
+    if formats & {"png", "jpg", "jpeg", "tif", "tiff"}:
+        timed("ocr", lambda: __import__("utils.ocr"))
+    if pdf_output:
+        def load_renderer():
+            from utils.pdf_renderer import get_renderer
+            get_renderer()
+        timed("pdf_renderer", load_renderer)
+
+    return timings
@@ -0,0 +1,174 @@
+import math
+import random
+import threading
+
+import numpy as np
+
+from utils.Diet_Generator import generate_diet as diet_rules
+from utils.meal_catalog import get_catalog
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+_M64 = (1 << 64) - 1
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix(x):
+    # splitmix64 finaliser, elementwise over uint64 arrays (wraps mod 2**64)
+    x = (x ^ (x >> np.uint64(30))) * _MIX1
+    x = (x ^ (x >> np.uint64(27))) * _MIX2
+    return x ^ (x >> np.uint64(31))
+
+
+def day_names(days):
+    if days <= len(WEEKDAYS):
+        return list(WEEKDAYS[:days])
+    return [f"{WEEKDAYS[d % 7]} (week {d // 7 + 1})" for d in range(days)]
+
+
+def _seed_array(seeds):
+    # None draws from the global random module, so unseeded plans stay
+    # random the way random.sample plans were.
+    return np.array(
+        [random.getrandbits(64) if s is None else int(s) & _M64 for s in seeds],
+        dtype=np.uint64
+    )
+
+
+# --------------------------------------------------
+# SEEDED WEEKLY PLANNER
+# --------------------------------------------------
+class WeeklyPlanner:
+    # Each slot's meals for a patient are a permutation of the slot's pool
+    # keyed only by the seed, repeated cyclically over the plan. So:
+    #   - a slot repeats a meal only every `cycle` days (the pool size, or
+    #     the number of days when the pool is large enough: no repeats);
+    #   - the same seed gives the same plan, alone or inside a batch;
+    #   - a batch is one hash + argsort per slot over a (patients, pool)
+    #     matrix, not a Python loop per patient.
+
+    def __init__(self, catalog=None, days=7, repeat_window=None):
+        # repeat_window: minimum number of days between two servings of the
+        # same meal in a slot. None means as wide as the pools allow; a
+        # value the pools can't meet raises ValueError.
+        self.catalog = catalog or get_catalog()
+        self.days = days
+        self.repeat_window = repeat_window
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _cycles(self, sizes):
+        days = self.days
+        cycles = [min(size, days) for size in sizes]
+        window = self.repeat_window or 1
+
+        for size, cycle in zip(sizes, cycles):
+            if cycle < days and cycle < window:
+                raise ValueError(
+                    f"only {size} meals available; can't avoid repeats within {window} days"
+                )
+
+        # If every slot cycles with the same short period, whole days would
+        # repeat. Shorten later slots by one meal while that makes the
+        # combined period longer and keeps the repeat window.
+        for i in reversed(range(len(cycles))):
+            if math.lcm(*cycles) >= days:
+                break
+            shorter = cycles[:i] + [cycles[i] - 1] + cycles[i + 1:]
+            if cycles[i] - 1 >= max(window, 2) and math.lcm(*shorter) > math.lcm(*cycles):
+                cycles = shorter
+        return cycles
+
+    def pools(self, diet_type, conditions, restrictions=()):
+        # slot -> (meal array, day -> pool position within the permutation)
+        key = (diet_type, tuple(conditions), tuple(sorted(set(restrictions))))
+        entry = self._pools.get(key)
+        if entry is not None:
+            return entry
+
+        catalog = self.catalog
+        meals = []
+        for slot in catalog.slots:
+            pool = catalog.meal_pool(diet_type, key[1], slot, minimum=self.days, restrictions=key[2])
+            if not pool:
+                raise ValueError(f"no {diet_type} {slot} meals left for {' + '.join(key[1])} "
+                                 f"without {', '.join(key[2])}")
+            meals.append(np.array(pool, dtype=object))
+
+        cycles = self._cycles([len(m) for m in meals])
+        entry = {
+            slot: (pool, np.arange(self.days) % cycle)
+            for slot, pool, cycle in zip(catalog.slots, meals, cycles)
+        }
+        with self._lock:
+            self._pools[key] = entry
+        return entry
+
+    def plan_batch(self, diet_type, conditions, seeds, restrictions=()):
+        # Plans for many patients sharing diet type, conditions and
+        # restrictions: slot -> (len(seeds), days) array of meal names.
+        base = _mix(_seed_array(seeds) + _GOLDEN)[:, None]
+        plans = {"Day": day_names(self.days)}
+        for i, (slot, (pool, positions)) in enumerate(self.pools(diet_type, conditions, restrictions).items()):
+            salt = np.uint64((i + 1) * int(_GOLDEN) & _M64) + np.arange(len(pool), dtype=np.uint64)
+            order = np.argsort(_mix(base ^ salt), axis=1, kind="stable")
+            plans[slot] = pool[order[:, positions]]
+        return plans
+
+    def plan(self, diet_type, conditions, seed=None, restrictions=()):
+        batch = self.plan_batch(diet_type, conditions, [seed], restrictions)
+        plan = {"Day": batch.pop("Day")}
+        for slot, meals in batch.items():
+            plan[slot] = meals[0].tolist()
+        return plan
+
+    def plan_for_text(self, text, diet_type="Veg", seed=None):
+        conditions, restrictions = self.requirements(text)
+        return self.plan(diet_type, conditions, seed, restrictions)
+
+    def requirements(self, text):
+        # Conditions from the catalog keywords, restrictions from the rules
+        # in Diet_Generator.
+        return self.catalog.match_conditions(text), tuple(diet_rules(text)["restricted_foods"])
+
+    def plan_many(self, texts, diet_type="Veg", seeds=None):
+        # One plan per report text. Reports are grouped by what they need so
+        # each group is planned in a single vectorized batch.
+        seeds = list(seeds) if seeds is not None else [None] * len(texts)
+        groups = {}
+        needs = {}  # exports repeat the same prescription text a lot
+        for i, text in enumerate(texts):
+            need = needs.get(text)
+            if need is None:
+                need = needs[text] = self.requirements(text)
+            groups.setdefault(need, []).append(i)
+
+        plans = [None] * len(texts)
+        for (conditions, restrictions), rows in groups.items():
+            batch = self.plan_batch(diet_type, conditions, [seeds[i] for i in rows], restrictions)
+            days = batch.pop("Day")
+            for j, i in enumerate(rows):
+                plan = {"Day": days}
+                for slot, meals in batch.items():
+                    plan[slot] = meals[j].tolist()
+                plans[i] = plan
+        return plans
+
+
+_planners = {}
+_planners_lock = threading.Lock()
+
+
+def get_planner(days=7, repeat_window=None):
+    # One planner (and pool cache) per settings and catalog.
+    catalog = get_catalog()
+    key = (days, repeat_window, id(catalog))
+    planner = _planners.get(key)
+    if planner is None:
+        with _planners_lock:
+            planner = _planners.get(key)
+            if planner is None:
+                planner = _planners[key] = WeeklyPlanner(catalog, days, repeat_window)
+    return planner
@@ -1,29 +1,453 @@
-import joblib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
 import pandas as pd
 
+from utils import metrics
+from utils.model_registry import get_model, peak_rss_bytes, rss_bytes
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Model")
+DEFAULT_MODEL_FILE = os.path.join(MODEL_DIR, "lightgbm_model (2).pkl")
+# Versioned artifacts written by train(): <root>/v0001/model.txt + metadata.json
+DEFAULT_ARTIFACT_ROOT = os.path.join(MODEL_DIR, "health_risk")
+
+STATUS_MAP = {0: "Normal", 1: "Abnormal"}
+
+FEATURES = (
+    "age",
+    "glucose",
+    "cholesterol",
+    "blood_pressure",
+    "bmi"
+)
+
+
+def resolve_model_file(path):
+    # A model file, or an artifact root / version directory from train().
+    if not os.path.isdir(path):
+        return path
+    if os.path.exists(os.path.join(path, "model.txt")):
+        return os.path.join(path, "model.txt")
+    version = latest_version(path)
+    if version is None:
+        raise FileNotFoundError(f"no trained model versions under {path}")
+    return os.path.join(path, version, "model.txt")
+
+
 class HealthRiskAnalyzer:
-    def __init__(self, model_file):
+    def __init__(self, model_file, batch_size=65536, dtype=np.float64):
         self.model_file = model_file
         self._model = None
-        self.features = (
-            "age",
-            "glucose",
-            "cholesterol",
-            "blood_pressure",
-            "bmi"
-        )
+        self.batch_size = batch_size
+        self.dtype = dtype
+        self.features = FEATURES
 
     def _load(self):
-        if self._model is None:
-            self._model = joblib.load(self.model_file)
+        # The registry shares one copy per host process and reloads it when
+        # the file on disk changes (or a new version is published).
+        self._model = get_model(resolve_model_file(self.model_file))
+
+    def accepts_features(self):
+        # False for models trained on a different feature set (the bundled
+        # pickle has 7 columns), which analyze() would score as garbage.
+        self._load()
+        booster = getattr(self._model, "booster_", self._model)
+        return booster.num_feature() == len(self.features)
 
     def analyze(self, patient_record):
+        with metrics.stage("analyze"):
+            return self._analyze(patient_record)
+
+    def _analyze(self, patient_record):
         self._load()
-        
+
+        if not hasattr(self._model, "predict_proba"):
+            # Native booster: predict() returns probabilities, not labels.
+            labels, _ = self.analyze_batch([patient_record])
+            return labels[0]
+
         row = {f: float(patient_record.get(f, 0)) for f in self.features}
         frame = pd.DataFrame([row])
-        
+
         pred_label = int(self._model.predict(frame)[0])
-        status_map = {0: "Normal", 1: "Abnormal"}
-        
-        return status_map.get(pred_label, "Unknown")
\ No newline at end of file
+
+        return STATUS_MAP.get(pred_label, "Unknown")
+
+    # --------------------------------------------------
+    # BATCH SCORING
+    # --------------------------------------------------
+    def _to_matrix(self, records):
+        # Coerce the feature columns once into a contiguous matrix.
+        if isinstance(records, np.ndarray):
+            matrix = records
+            if matrix.ndim == 1:
+                matrix = matrix.reshape(1, -1)
+            if matrix.shape[1] != len(self.features):
+                raise ValueError(
+                    f"Expected {len(self.features)} feature columns "
+                    f"{self.features}, got {matrix.shape[1]}"
+                )
+        elif isinstance(records, pd.DataFrame):
+            columns = []
+            for f in self.features:
+                if f in records.columns:
+                    columns.append(pd.to_numeric(records[f]).to_numpy(dtype=self.dtype))
+                else:
+                    columns.append(np.zeros(len(records), dtype=self.dtype))
+            matrix = np.column_stack(columns) if len(records) else np.empty((0, len(self.features)))
+        else:
+            matrix = np.array(
+                [[float(r.get(f, 0)) for f in self.features] for r in records],
+                dtype=self.dtype
+            ).reshape(-1, len(self.features))
+
+        return np.ascontiguousarray(matrix, dtype=self.dtype)
+
+    def _predict_proba(self, matrix):
+        # Score through the native booster when available; it skips the
+        # per-call DataFrame/feature-name validation of the sklearn wrapper.
+        if hasattr(self._model, "booster_"):
+            booster = self._model.booster_
+        elif hasattr(self._model, "predict_proba"):
+            return self._model.predict_proba(matrix)
+        else:
+            booster = self._model
+
+        raw = booster.predict(matrix)
+        if raw.ndim == 1:
+            raw = np.column_stack((1.0 - raw, raw))
+        return raw
+
+    def analyze_batch(self, records, batch_size=None):
+        with metrics.stage("analyze_batch"):
+            return self._analyze_batch(records, batch_size)
+
+    def _analyze_batch(self, records, batch_size=None):
+        self._load()
+
+        matrix = self._to_matrix(records)
+        batch_size = batch_size or self.batch_size
+        n = matrix.shape[0]
+        metrics.count("rows_scored", n)
+
+        classes = getattr(self._model, "classes_", None)
+        if classes is None:
+            classes = np.arange(2)
+        pred_labels = np.empty(n, dtype=np.int64)
+        probabilities = np.empty(n, dtype=np.float64)
+
+        for start in range(0, n, batch_size):
+            proba = self._predict_proba(matrix[start:start + batch_size])
+            # Same argmax rule the classifier applies in predict().
+            pred_labels[start:start + batch_size] = classes[np.argmax(proba, axis=1)]
+            probabilities[start:start + batch_size] = proba[:, -1]
+
+        labels = np.full(n, "Unknown", dtype=object)
+        for code, status in STATUS_MAP.items():
+            labels[pred_labels == code] = status
+
+        return labels, probabilities
+
+
+# --------------------------------------------------
+# OUT-OF-CORE TRAINING DATA
+# --------------------------------------------------
+LABEL_COLUMN = "label"
+DEFAULT_TRAIN_CHUNKSIZE = 250000
+
+DEFAULT_PARAMS = {
+    # Same shape as the shipped classifier.
+    "objective": "binary",
+    "learning_rate": 0.05,
+    "max_depth": 3,
+    "num_leaves": 31,
+    "feature_fraction": 0.5,
+    "bagging_fraction": 0.5,
+    "bagging_freq": 1,
+    "max_bin": 255,
+    "verbose": -1,
+}
+
+
+def _labels(series):
+    if not pd.api.types.is_numeric_dtype(series):
+        codes = {status: code for code, status in STATUS_MAP.items()}
+        series = series.map(lambda v: codes.get(v, v))
+    return pd.to_numeric(series).to_numpy(dtype=np.float32)
+
+
+def iter_training_chunks(paths, label_column=LABEL_COLUMN, chunksize=DEFAULT_TRAIN_CHUNKSIZE):
+    # (features float32 matrix, labels) per chunk from CSV or Parquet files;
+    # only the five feature columns and the label are read.
+    columns = list(FEATURES) + [label_column]
+    for path in paths:
+        if path.lower().endswith((".parquet", ".pq")):
+            import pyarrow.parquet as pq
+            batches = (
+                b.to_pandas()
+                for b in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns)
+            )
+        else:
+            dtypes = {f: "float32" for f in FEATURES}
+            batches = pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize)
+
+        for frame in batches:
+            X = np.ascontiguousarray(frame[list(FEATURES)].to_numpy(dtype=np.float32))
+            yield X, _labels(frame[label_column])
+
+
+def _spool(paths, directory, label_column, chunksize):
+    # Stream the inputs into on-disk float32 files and map them back: the
+    # Dataset is binned from the memmap a page at a time, so memory stays
+    # at one chunk plus LightGBM's binned copy (a byte per value).
+    features_path = os.path.join(directory, "features.f32")
+    labels_path = os.path.join(directory, "labels.f32")
+    rows = 0
+    with open(features_path, "wb") as xf, open(labels_path, "wb") as yf:
+        for X, y in iter_training_chunks(paths, label_column, chunksize):
+            X.tofile(xf)
+            y.tofile(yf)
+            rows += len(y)
+    if rows == 0:
+        raise ValueError(f"no training rows in {', '.join(paths)}")
+
+    X = np.memmap(features_path, dtype=np.float32, mode="r", shape=(rows, len(FEATURES)))
+    return X, np.fromfile(labels_path, dtype=np.float32)
+
+
+def _training_params(params, threads):
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    params["num_threads"] = threads or os.cpu_count() or 1
+    return params
+
+
+def _dataset(X, y, reference, params, free_raw_data=True):
+    # reference: an earlier .bin whose bin boundaries to reuse, so every
+    # batch is binned the same way.
+    import lightgbm as lgb
+
+    ref = lgb.Dataset(reference, params=params).construct() if reference else None
+    return lgb.Dataset(X, label=y, feature_name=list(FEATURES), reference=ref,
+                       params=params, free_raw_data=free_raw_data)
+
+
+def _save_binary(dataset, out_path):
+    if os.path.exists(out_path):
+        os.remove(out_path)
+    dataset.construct().save_binary(out_path)
+
+
+def build_dataset(paths, out_path, reference=None, label_column=LABEL_COLUMN,
+                  chunksize=DEFAULT_TRAIN_CHUNKSIZE, params=None, threads=None):
+    # CSV/Parquet -> LightGBM .bin Dataset, without loading the inputs.
+    params = _training_params(params, threads)
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(out_path))) as tmp:
+        X, y = _spool(paths, tmp, label_column, chunksize)
+        dataset = _dataset(X, y, reference, params)
+        _save_binary(dataset, out_path)
+        rows = len(y)
+        del dataset, X
+
+    return {"path": out_path, "rows": rows, "seconds": time.perf_counter() - start}
+
+
+# --------------------------------------------------
+# VERSIONED ARTIFACTS
+# --------------------------------------------------
+def latest_version(root):
+    try:
+        with open(os.path.join(root, "LATEST"), encoding="utf-8") as fh:
+            return fh.read().strip() or None
+    except FileNotFoundError:
+        versions = sorted(d for d in os.listdir(root) if d.startswith("v")) if os.path.isdir(root) else []
+        return versions[-1] if versions else None
+
+
+def _publish(root, booster, metadata):
+    # Write the version into a temp dir and rename it into place; LATEST
+    # moves last, so readers never see a half-written model.
+    os.makedirs(root, exist_ok=True)
+    existing = [int(d[1:]) for d in os.listdir(root) if d.startswith("v") and d[1:].isdigit()]
+    version = f"v{max(existing, default=0) + 1:04d}"
+    metadata["version"] = version
+
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=root)
+    try:
+        booster.save_model(os.path.join(staging, "model.txt"))
+        with open(os.path.join(staging, "metadata.json"), "w", encoding="utf-8") as fh:
+            json.dump(metadata, fh, indent=2)
+        os.rename(staging, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    latest = os.path.join(root, "LATEST")
+    with open(latest + ".tmp", "w", encoding="utf-8") as fh:
+        fh.write(version + "\n")
+    os.replace(latest + ".tmp", latest)
+    return os.path.join(root, version)
+
+
+# --------------------------------------------------
+# TRAINING
+# --------------------------------------------------
+def train(inputs, root=DEFAULT_ARTIFACT_ROOT, rounds=100, warm_start=False, valid=None,
+          params=None, threads=None, label_column=LABEL_COLUMN, chunksize=DEFAULT_TRAIN_CHUNKSIZE,
+          dataset_dir=None):
+    # inputs: one batch of CSV/Parquet files, or a single .bin from
+    # build_dataset. warm_start adds `rounds` trees for the batch to the
+    # latest version under root. LightGBM has to score the batch with the
+    # parent model for that, which needs the raw rows, so a warm start
+    # reads CSV/Parquet (through the memmap spool, not pandas in memory).
+    import lightgbm as lgb
+
+    params = _training_params(params, threads)
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    timings = {}
+
+    binaries = [p for p in inputs if p.lower().endswith(".bin")]
+    raw = [p for p in inputs if not p.lower().endswith(".bin")]
+    if binaries and (raw or len(binaries) > 1):
+        raise ValueError("pass CSV/Parquet files or a single .bin Dataset, not both")
+    if binaries and warm_start:
+        raise ValueError("warm start needs the batch as CSV/Parquet to score it with the parent model")
+
+    parent = latest_version(root) if warm_start else None
+    init_model = os.path.join(root, parent, "model.txt") if parent else None
+    reference = None
+    if parent:
+        with open(os.path.join(root, parent, "metadata.json"), encoding="utf-8") as fh:
+            reference = json.load(fh).get("reference_dataset")
+        if reference and not os.path.exists(reference):
+            reference = None
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(root)) or None) as tmp:
+        if raw:
+            # The batch is also kept as a .bin: it is the bin reference for
+            # later warm starts and can be retrained from without parsing.
+            step = time.perf_counter()
+            X, y = _spool(raw, tmp, label_column, chunksize)
+            dataset = _dataset(X, y, reference, params, free_raw_data=False)
+            dataset_dir = dataset_dir or os.path.join(root, "datasets")
+            os.makedirs(dataset_dir, exist_ok=True)
+            # mkstemp reserves a unique name: two trainings in the same
+            # second must not overwrite each other's dataset.
+            fd, data_path = tempfile.mkstemp(
+                prefix=f"batch-{time.strftime('%Y%m%d-%H%M%S')}-", suffix=".bin", dir=dataset_dir
+            )
+            os.close(fd)
+            _save_binary(dataset, data_path)
+            timings["dataset_seconds"] = time.perf_counter() - step
+        else:
+            data_path = binaries[0]
+            dataset = lgb.Dataset(data_path, params=params)
+
+        # Scoring the whole training set every round costs as much as the
+        # boosting itself; only a held-out set is evaluated per round.
+        valid_sets, valid_names = [], []
+        if valid:
+            valid_sets.append(lgb.Dataset(valid, reference=dataset, params=params)
+                              if valid.lower().endswith(".bin") else
+                              _in_memory_dataset(valid, dataset, params, label_column))
+            valid_names.append("valid")
+
+        evals = {}
+        step = time.perf_counter()
+        booster = lgb.train(
+            dict(params, metric=["binary_logloss", "auc"]),
+            dataset,
+            num_boost_round=rounds,
+            init_model=init_model,
+            valid_sets=valid_sets,
+            valid_names=valid_names,
+            callbacks=[lgb.record_evaluation(evals)],
+        )
+        timings["train_seconds"] = time.perf_counter() - step
+        rows = dataset.num_data()
+        del dataset
+
+    metadata = {
+        "features": list(FEATURES),
+        "label_column": label_column,
+        "params": params,
+        "rounds_added": rounds,
+        "num_trees": booster.num_trees(),
+        "rows": rows,
+        "parent": parent,
+        "inputs": [os.path.abspath(p) for p in inputs],
+        "dataset": os.path.abspath(data_path),
+        "reference_dataset": os.path.abspath(reference or data_path),
+        "scores": {
+            name: {metric: values[-1] for metric, values in results.items()}
+            for name, results in evals.items()
+        },
+        "lightgbm_version": lgb.__version__,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "seconds": time.perf_counter() - started,
+        **timings,
+        "rss_delta_bytes": rss_bytes() - rss_before,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+    metadata["path"] = _publish(root, booster, metadata)
+    return metadata
+
+
+def _in_memory_dataset(path, reference, params, label_column):
+    import lightgbm as lgb
+
+    chunks = list(iter_training_chunks([path], label_column))
+    X = np.concatenate([c[0] for c in chunks])
+    y = np.concatenate([c[1] for c in chunks])
+    return lgb.Dataset(X, label=y, feature_name=list(FEATURES), reference=reference, params=params)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the health risk model out of core.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ds = sub.add_parser("dataset", help="Bin CSV/Parquet files into a LightGBM .bin Dataset")
+    ds.add_argument("inputs", nargs="+")
+    ds.add_argument("--out", required=True)
+    ds.add_argument("--reference", help="Earlier .bin whose bins to reuse")
+
+    tr = sub.add_parser("train", help="Train (or continue training) and publish a new version")
+    tr.add_argument("inputs", nargs="+", help="CSV/Parquet files or .bin Datasets")
+    tr.add_argument("--root", default=DEFAULT_ARTIFACT_ROOT, help="Versioned artifact directory")
+    tr.add_argument("--rounds", type=int, default=100)
+    tr.add_argument("--warm-start", action="store_true", help="Continue from the latest version")
+    tr.add_argument("--valid", help="Held-out CSV/Parquet/.bin to score")
+
+    for p in (ds, tr):
+        p.add_argument("--label", default=LABEL_COLUMN)
+        p.add_argument("--chunksize", type=int, default=DEFAULT_TRAIN_CHUNKSIZE)
+        p.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "dataset":
+        built = build_dataset(args.inputs, args.out, args.reference, args.label,
+                              args.chunksize, threads=args.threads)
+        print(f"{built['rows']:,} rows -> {built['path']} in {built['seconds']:.1f}s, "
+              f"peak RSS {peak_rss_bytes() / 2**20:.1f} MiB")
+        return
+
+    meta = train(args.inputs, args.root, args.rounds, args.warm_start, args.valid,
+                 threads=args.threads, label_column=args.label, chunksize=args.chunksize)
+    print(f"{meta['version']}: {meta['num_trees']} trees on {meta['rows']:,} rows "
+          f"(parent {meta['parent'] or '-'}) in {meta['seconds']:.1f}s "
+          f"[dataset {meta.get('dataset_seconds', 0.0):.1f}s, train {meta['train_seconds']:.1f}s], "
+          f"peak RSS {meta['peak_rss_bytes'] / 2**20:.1f} MiB")
+    for name, values in meta["scores"].items():
+        print(f"  {name}: " + ", ".join(f"{k}={v:.4f}" for k, v in values.items()))
+    print(f"  -> {meta['path']}")
+
+
+if __name__ == "__main__":
+    main()